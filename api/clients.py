@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from db.session import get_db
 from db.models import Client
-from schemas import ClientCreate, ClientUpdate
-from api.dependencies import verify_admin_auth
+from api.schemas import ClientCreate, ClientUpdate
+from api.dependencies import verify_admin_auth, invalidate_principal
 
 router = APIRouter(prefix="/admin/clients", tags=["Admin Clients"])
 
@@ -36,6 +36,7 @@ def update_client(client_id: str, update_data: ClientUpdate, db: Session = Depen
     for key, value in update_data.dict(exclude_unset=True).items():
         setattr(client, key, value)
     db.commit()
+    invalidate_principal(client_id)
     db.refresh(client)
     return {"message": "Client updated"}
 
@@ -46,4 +47,5 @@ def delete_client(client_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Client not found")
     db.delete(client)
     db.commit()
+    invalidate_principal(client_id)
     return {"message": "Client deleted"}
@@ -2,10 +2,18 @@
 from fastapi import Depends, HTTPException, status, Header, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from db.session import get_db
+from db.async_session import get_async_db
 from db.models import Client
+from config.settings import settings
+from core.response_cache import ResponseCache
+from core.cluster_bus import cluster_bus
+from dataclasses import dataclass
 from typing import Optional
+import hashlib
 
 
 # Secret config (move these to config/settings)
@@ -14,6 +22,90 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+
+@dataclass(frozen=True)
+class Principal:
+    # What the auth dependencies resolve to: an active client, detached from any DB session
+    client_id: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.client_id == "admin"
+
+
+# Resolved principals, so a repeat caller is authenticated without querying `clients`.
+# Only successful lookups are cached; entries are tagged by client_id and dropped
+# as soon as that client is updated, deactivated or deleted, on every controller process.
+principal_cache = ResponseCache(ttl=settings.PRINCIPAL_CACHE_TTL, max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+class _PrincipalNotFound(Exception):
+    pass
+
+
+def principal_tag(client_id: str) -> str:
+    # clients.client_id compares case-insensitively and ignoring trailing spaces (MySQL's default
+    # collation), so "ClientA " resolves the "clienta" row; tag both spellings alike so an
+    # invalidation with either reaches every cached entry
+    return f"client:{client_id.rstrip(' ').casefold()}"
+
+
+def invalidate_principal(client_id: str):
+    principal_cache.invalidate(principal_tag(client_id))
+    cluster_bus.publish("principal_invalidated", client_id=client_id)
+
+
+cluster_bus.subscribe(
+    "principal_invalidated", lambda message: principal_cache.invalidate(principal_tag(message["client_id"]))
+)
+
+
+def _principal_key(client_id: str, license_key: Optional[str]) -> tuple:
+    if license_key is None:
+        return ("sub", client_id)
+    # Never keep raw license keys in memory as cache keys
+    return ("license", client_id, hashlib.sha256(license_key.encode()).hexdigest())
+
+
+def _principal_query(client_id: str, license_key: Optional[str]):
+    query = select(Client.client_id).where(Client.client_id == client_id, Client.is_active == True)
+    if license_key is not None:
+        query = query.where(Client.license_key == license_key)
+    return query.limit(1)
+
+
+def resolve_principal(db: Session, client_id: str, license_key: Optional[str] = None) -> Optional[Principal]:
+    """
+    Active client by id (token subject) or by id + license key, served from
+    principal_cache when possible. Returns None for unknown, inactive or
+    wrong-key clients.
+    """
+    def load():
+        row = db.execute(_principal_query(client_id, license_key)).first()
+        if not row:
+            raise _PrincipalNotFound()
+        return Principal(client_id=row.client_id)
+
+    try:
+        return principal_cache.get_or_load(_principal_key(client_id, license_key), load, tags=[principal_tag(client_id)])
+    except _PrincipalNotFound:
+        return None
+
+async def resolve_principal_async(db: AsyncSession, client_id: str, license_key: Optional[str] = None) -> Optional[Principal]:
+    # resolve_principal() for `async def` routes: same cache, keys and query, on the async engine
+    async def load():
+        row = (await db.execute(_principal_query(client_id, license_key))).first()
+        if not row:
+            raise _PrincipalNotFound()
+        return Principal(client_id=row.client_id)
+
+    try:
+        return await principal_cache.aget_or_load(
+            _principal_key(client_id, license_key), load, tags=[principal_tag(client_id)]
+        )
+    except _PrincipalNotFound:
+        return None
+
 def decode_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -35,7 +127,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     decoded = decode_token(token)
     if decoded["role"] != "user":
         raise HTTPException(status_code=403, detail="User role required")
-    client = db.query(Client).filter(Client.client_id == decoded["client_id"], Client.is_active == True).first()
+    client = resolve_principal(db, decoded["client_id"])
     if not client:
         raise HTTPException(status_code=404, detail="User not found or inactive")
     return client
@@ -44,7 +136,7 @@ def get_current_admin(token: str = Depends(oauth2_scheme), db: Session = Depends
     decoded = decode_token(token)
     if decoded["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin role required")
-    client = db.query(Client).filter(Client.client_id == decoded["client_id"], Client.is_active == True).first()
+    client = resolve_principal(db, decoded["client_id"])
     if not client or client.client_id != "admin":
         raise HTTPException(status_code=403, detail="Admin not found or inactive")
     return client
@@ -69,7 +161,7 @@ def verify_client_auth(
             if role != "user":
                 raise HTTPException(status_code=403, detail="User role required")
 
-            client = db.query(Client).filter(Client.client_id == client_id, Client.is_active == True).first()
+            client = resolve_principal(db, client_id)
             if not client:
                 raise HTTPException(status_code=401, detail="Invalid or inactive client")
             return client
@@ -80,11 +172,7 @@ def verify_client_auth(
     if not x_client_id or not x_license_key:
         raise HTTPException(status_code=401, detail="Missing credentials")
 
-    client = db.query(Client).filter(
-        Client.client_id == x_client_id,
-        Client.license_key == x_license_key,
-        Client.is_active == True
-    ).first()
+    client = resolve_principal(db, x_client_id, x_license_key)
     if not client:
         raise HTTPException(status_code=401, detail="Invalid or inactive client credentials")
     return client
@@ -105,7 +193,7 @@ def verify_admin_auth(
             role = payload.get("role")
             if not client_id or role != "admin":
                 raise HTTPException(status_code=403, detail="Admin role required")
-            client = db.query(Client).filter(Client.client_id == client_id, Client.is_active == True).first()
+            client = resolve_principal(db, client_id)
             if not client or client.client_id != "admin":
                 raise HTTPException(status_code=403, detail="Admin not found or inactive")
             return client
@@ -116,58 +204,62 @@ def verify_admin_auth(
     if not x_client_id or not x_license_key:
         raise HTTPException(status_code=401, detail="Missing credentials")
 
-    client = db.query(Client).filter(
-        Client.client_id == x_client_id,
-        Client.license_key == x_license_key,
-        Client.is_active == True
-    ).first()
+    client = resolve_principal(db, x_client_id, x_license_key)
     if not client or client.client_id != "admin":
         raise HTTPException(status_code=403, detail="Admin access only")
     return client
 
 
-def get_current_client_data(
-    request: Request,
-    x_client_id: Optional[str] = Header(None, convert_underscores=False),
-    x_license_key: Optional[str] = Header(None, convert_underscores=False),
-    db: Session = Depends(get_db)
-):
+def _client_credentials(request: Request, x_client_id: Optional[str], x_license_key: Optional[str]) -> tuple:
+    """
+    Credentials for the client data dependencies: (client_id, None) from a
+    valid Bearer token, else (x-client-id, x-license-key). Raises 401 when
+    neither is usable; the caller resolves the principal.
+    """
     # First, try Bearer token auth
     auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.startswith("Bearer "):
         token = auth_header.split(" ")[1]
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            client_id = payload.get("sub")
-            role = payload.get("role")
-            if not client_id or not role:
-                raise HTTPException(status_code=401, detail="Invalid token")
-
-            client = db.query(Client).filter(Client.client_id == client_id, Client.is_active == True).first()
-            if not client:
-                raise HTTPException(status_code=401, detail="Invalid or inactive client")
-
-            return {
-                "client_id": client.client_id,
-                "is_admin": client.client_id == "admin"
-            }
-
         except JWTError:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
+        client_id = payload.get("sub")
+        if not client_id or not payload.get("role"):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return client_id, None
 
     # Fallback to x-client-id and x-license-key
     if not x_client_id or not x_license_key:
         raise HTTPException(status_code=401, detail="Missing credentials")
+    return x_client_id, x_license_key
+
 
-    client = db.query(Client).filter(
-        Client.client_id == x_client_id,
-        Client.license_key == x_license_key,
-        Client.is_active == True
-    ).first()
+def _client_data(client: Optional[Principal]) -> dict:
     if not client:
         raise HTTPException(status_code=401, detail="Invalid or inactive client")
-
     return {
         "client_id": client.client_id,
         "is_admin": client.client_id == "admin"
-    }
\ No newline at end of file
+    }
+
+
+def get_current_client_data(
+    request: Request,
+    x_client_id: Optional[str] = Header(None, convert_underscores=False),
+    x_license_key: Optional[str] = Header(None, convert_underscores=False),
+    db: Session = Depends(get_db)
+):
+    client_id, license_key = _client_credentials(request, x_client_id, x_license_key)
+    return _client_data(resolve_principal(db, client_id, license_key))
+
+
+async def get_current_client_data_async(
+    request: Request,
+    x_client_id: Optional[str] = Header(None, convert_underscores=False),
+    x_license_key: Optional[str] = Header(None, convert_underscores=False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # get_current_client_data() for `async def` routes: no threadpool hop, lookups on the async engine
+    client_id, license_key = _client_credentials(request, x_client_id, x_license_key)
+    return _client_data(await resolve_principal_async(db, client_id, license_key))
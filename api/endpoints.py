@@ -1,8 +1,10 @@
 # controller/api/endpoints.py
 from fastapi import APIRouter, HTTPException, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from db.session import get_db
-from db import models
+from db.async_session import get_async_db
+from db import async_crud, models
 from api.schemas import S3CredentialCreate, S3CredentialResponse, JobCreateRequest, JobCreateResponse
 from datetime import datetime, timezone
 from pydantic import BaseModel
@@ -11,9 +13,15 @@ import uuid
 import socket
 import platform
 
-from typing import Optional
+from typing import List, Optional
 
-from db.crud import create_job_with_tracks
+from db.crud import create_job_with_tracks, claim_jobs, renew_leases
+from config.settings import settings
+from core.dispatch_signal import dispatch_wakeup
+from core.log_sink import job_log_sink
+from core.progress_cache import progress_tracker
+from core.job_events import job_events
+from services.worker_registry import worker_registry
 
 router = APIRouter()
 
@@ -24,6 +32,10 @@ class ProgressUpdateRequest(BaseModel):
     progress: int
     duration: Optional[float] = None  # Accepts int, float, or null
 
+class HeartbeatRequest(BaseModel):
+    job_ids: List[str]
+    worker_id: Optional[int] = None
+
 
 @router.post("/credentials-old", response_model=S3CredentialResponse)
 def create_s3_credential(cred: S3CredentialCreate, db: Session = Depends(get_db)):
@@ -98,43 +110,39 @@ def create_job(request: JobCreateRequest, db: Session = Depends(get_db)):
     
 @router.get("/api/queue/next", response_model=JobCreateRequest)
 def get_next_job(db: Session = Depends(get_db)):
-    job = db.query(models.Job).filter(models.Job.status == "queued").order_by(models.Job.created_at.asc()).first()
-    if not job:
+    jobs = claim_jobs(db, limit=1, status="processing", progress=0)
+    if not jobs:
         raise HTTPException(status_code=404, detail="No jobs available")
-    job.status = "processing"
-    job.progress = 0
-    db.commit()
-    return job
+    return jobs[0]
 
 
 @router.post("/queue/{job_id}/status")
-def update_job_status(
+async def update_job_status(
     job_id: str,
     data: StatusUpdateRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-
-    job.status = data.status
-    job.updated_at = datetime.now(timezone.utc)
-
     # Extract machine/request info
     requester_ip = request.headers.get("x-forwarded-for", request.client.host)
     hostname = socket.gethostname()
     system = platform.system()
     arch = platform.machine()
 
-    # Save info in job table
-    job.requester_ip = requester_ip
-    job.machine = hostname
-    job.os = system
-    job.arch = arch
+    # A status change always carries the latest reported progress with it. The job's
+    # rollups, lease and worker slot (released exactly and idempotently once it
+    # finishes) are updated in the same transaction
+    latest = progress_tracker.get(job_id)
+    reported = await async_crud.apply_status_report(
+        db, job_id, data.status, latest,
+        requester_ip=requester_ip, machine=hostname, os=system, arch=arch,
+    )
+    if reported is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job, worker_id, slot_released = reported
 
-    # Also insert into job_logs
-    log_entry = models.JobLog(
+    # Also insert into job_logs (buffered, written in batches)
+    await job_log_sink.arecord(
         job_id=job_id,
         event_type="status_update",
         event_value=data.status,
@@ -143,70 +151,81 @@ def update_job_status(
         os=system,
         arch=arch
     )
-    db.add(log_entry)
 
     print(f"job requester_ip : {job.requester_ip}")
 
-    if job.progress == 100 or job.status == "completed" or job.status == "failed":
-        # Decrement current_jobs for the worker
-        worker = db.query(models.WorkerInstance).filter(
-            models.WorkerInstance.public_ip == job.requester_ip  
-        ).first()
-        if worker and worker.current_jobs > 0:
-            worker.current_jobs -= 1
-            worker.last_active = datetime.now(timezone.utc)
-            db.commit()
+    job_events.publish(job_id, "status", client_id=job.client_id, status=job.status, progress=job.progress)
+
+    if job.status in ("completed", "failed"):
+        progress_tracker.forget(job_id)
+    elif latest:
+        progress_tracker.mark_persisted(job_id, job.progress, latest.duration)
+    if slot_released or job.status in ("completed", "failed"):
+        # A slot was freed; let the dispatcher fill it right away
+        if slot_released:
+            worker_registry.release(worker_id, job_id)
+        else:
+            worker_registry.finish_job(job_id)
+        dispatch_wakeup.notify()
 
-    db.commit()
     return {"job_id": job_id, "status": job.status}
 
 
+@router.post("/queue/heartbeat")
+def heartbeat(data: HeartbeatRequest, db: Session = Depends(get_db)):
+    """
+    Workers call this every few seconds (well within JOB_LEASE_SECONDS) with
+    the ids of every job they are running. Jobs listed in `cancel` are no
+    longer theirs (finished, reaped or unknown) and should be abandoned.
+    """
+    cancel = renew_leases(db, data.job_ids, data.worker_id)
+    return {
+        "renewed": len(set(data.job_ids)) - len(cancel),
+        "cancel": sorted(cancel),
+        "lease_seconds": settings.JOB_LEASE_SECONDS,
+    }
+
+
 @router.post("/queue/{job_id}/progress")
-def update_job_progress(
+async def update_job_progress(
     job_id: str,
     data: ProgressUpdateRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-
     if not (0 <= data.progress <= 100):
         raise HTTPException(status_code=400, detail="Progress must be between 0 and 100")
 
-    job.progress = data.progress
-    job.updated_at = datetime.now(timezone.utc)
-
-    if data.duration is not None:
-        job.content_duration = int(data.duration)
-
-    # Extract requester machine details
     requester_ip = request.headers.get("x-forwarded-for", request.client.host)
-    hostname = socket.gethostname()
-    system = platform.system()
-    arch = platform.machine()
-
-    # Save in Job table
-    job.requester_ip = requester_ip
-    job.machine = hostname
-    job.os = system
-    job.arch = arch
+    duration = int(data.duration) if data.duration is not None else None
+
+    # Latest progress lives in memory; only meaningful changes are written to the DB.
+    # The owner is resolved here, on the async engine, so publish() never queries on the loop
+    client_id = await async_crud.job_owner(db, job_id)
+    if client_id:
+        job_events.publish(job_id, "progress", client_id=client_id, progress=data.progress, duration=duration)
+    if not progress_tracker.report(job_id, data.progress, duration, requester_ip):
+        return {"job_id": job_id, "progress": data.progress}
+
+    # Only a duration not yet written costs the rollups' locking read
+    new_duration = progress_tracker.duration_to_persist(job_id)
+    if not await async_crud.persist_job_progress(db, job_id, data.progress, new_duration, requester_ip):
+        progress_tracker.forget(job_id)
+        raise HTTPException(status_code=404, detail="Job not found")
+    progress_tracker.mark_persisted(job_id, data.progress, new_duration)
 
-    # Log to job_logs
-    log_entry = models.JobLog(
+    # Log to job_logs (buffered, written in batches)
+    await job_log_sink.arecord(
         job_id=job_id,
         event_type="progress_update",
         event_value=str(data.progress),
         ip_address=requester_ip,
-        machine=hostname,
-        os=system,
-        arch=arch
+        machine=socket.gethostname(),
+        os=platform.system(),
+        arch=platform.machine()
     )
-    db.add(log_entry)
 
-    db.commit()
-    return {"job_id": job_id, "progress": job.progress}
+    return {"job_id": job_id, "progress": data.progress}
 
 
 @router.get("/queue/{job_id}/logs")
@@ -5,17 +5,34 @@ from api import endpoints
 from fastapi.middleware.cors import CORSMiddleware
 
 from services.worker_dispatcher import WorkerDispatcher
+from services.worker_lifecycle import WorkerReconciler
+from services.autoscaler import Autoscaler
+from services.lease_reaper import LeaseReaper
+from services.worker_registry import worker_registry
+from services.worker_client import worker_clients
+from core.dispatch_signal import dispatch_wakeup
+from core.leader import LeaderElector, controller_identity
+from core.membership import ClusterMembership
+from core.loops import start_loop
+from core.log_sink import job_log_sink
+from core.job_events import job_events
+from core.progress_cache import progress_tracker
+from config.settings import settings
 import threading, time
+import logging
 
 from sqlalchemy.orm import Session
 from db.session import get_db
 from api.schemas import JobCompleteSchema
+from api.dependencies import verify_admin_auth
 from db import crud
 import socket
 import platform
 
 from api.route import client, credentials, job, dashboard, auth
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
 # Allow requests from your frontend
@@ -31,6 +48,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination cursor for /api/jobs; browsers hide non-safelisted headers otherwise
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(endpoints.router)
@@ -43,16 +62,119 @@ app.include_router(job.router)
 app.include_router(dashboard.router)
 app.include_router(auth.router)
 
-dispatcher = WorkerDispatcher()
+identity = controller_identity()
+# Every process joins the membership, whose members are the cluster bus peers. Partitioned: every
+# process also dispatches for the workers it owns; otherwise the leader does it all
+partitioned = settings.DISPATCH_MODE == "partitioned"
+membership = ClusterMembership(identity, route_wakeups=partitioned)
+partition = membership if partitioned else None
+worker_registry.partition = partition
+
+reconciler = WorkerReconciler(registry=worker_registry, partition=partition)
+autoscaler = Autoscaler(reconciler, registry=worker_registry, partition=partition)
+dispatcher = WorkerDispatcher(reconciler, autoscaler=autoscaler, partition=partition)
+lease_reaper = LeaseReaper(registry=worker_registry)
+
+def start_dispatch_loop(stopping: threading.Event):
+    # Passes are triggered by dispatch_wakeup; the timed poll is only a safety
+    # net and backs off while nothing is being dispatched
+    poll_interval = settings.POLL_INTERVAL
+    while not stopping.is_set():
+        try:
+            dispatched = dispatcher.dispatch_pending_jobs()
+        except Exception as e:
+            logger.error(f"Dispatch pass failed: {e}")
+            dispatched = 0
+
+        if dispatched:
+            poll_interval = settings.POLL_INTERVAL
+            continue
+
+        if dispatch_wakeup.wait(poll_interval):
+            poll_interval = settings.POLL_INTERVAL
+        else:
+            poll_interval = min(poll_interval * 2, settings.MAX_POLL_INTERVAL)
+
+
+dispatch_stopping = threading.Event()
+
+
+def start_dispatch_tasks():
+    # Dispatch, reconcile and autoscale: on the leader, or on every member when partitioned
+    global dispatch_stopping
+    # Another process may have dispatched in between: rebuild in-memory views from the DB
+    dispatcher.scheduler.invalidate()
+    worker_registry.invalidate()
+    dispatch_stopping = start_loop(start_dispatch_loop)
+    if settings.IS_PRODUCTION:
+        reconciler.start()
+        autoscaler.start()
+        worker_clients.start_prober()
+
+
+def stop_dispatch_tasks():
+    dispatch_stopping.set()
+    dispatch_wakeup.notify()
+    reconciler.stop()
+    autoscaler.stop()
+    worker_clients.stop_prober()
+
+
+def start_leader_tasks(term: int):
+    # Lease reaping stays with a single process in every mode
+    lease_reaper.start()
+    if not partitioned:
+        start_dispatch_tasks()
+
+
+def stop_leader_tasks():
+    lease_reaper.stop()
+    if not partitioned:
+        stop_dispatch_tasks()
+
+
+def rebalance_partitions():
+    # Controllers joined or left: place, reconcile and scale under the new worker ownership
+    worker_registry.rebalance()
+    reconciler.notify()
+    autoscaler.notify()
+    dispatch_wakeup.notify()
+
+
+leader = LeaderElector(
+    on_elected=start_leader_tasks, on_demoted=stop_leader_tasks,
+    identity=identity, forward_wakeups=not partitioned,
+)
+if partitioned:
+    membership.on_change = rebalance_partitions
 
-def start_dispatch_loop():
-    while True:
-        dispatcher.dispatch_pending_jobs()
-        time.sleep(5)  # Adjust polling interval as needed
 
 @app.on_event("startup")
 def start_background_tasks():
-    threading.Thread(target=start_dispatch_loop, daemon=True).start()
+    job_log_sink.start()
+    threading.Thread(target=membership.run_forever, daemon=True).start()
+    if partitioned:
+        start_dispatch_tasks()
+    threading.Thread(target=leader.run_forever, daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    # Hand leadership and membership over right away, then flush buffered job_logs rows before the process exits
+    leader.stop()
+    membership.stop()
+    job_log_sink.stop()
+
+
+@app.get("/api/controller/leader", dependencies=[Depends(verify_admin_auth)])
+def get_controller_leader():
+    return {
+        "identity": leader.identity,
+        "is_leader": leader.is_leader,
+        "term": leader.term,
+        "dispatch_mode": settings.DISPATCH_MODE,
+        "members": list(membership.members),
+    }
 
 
 @app.get("/")
@@ -80,12 +202,27 @@ def get_machine_info(request: Request):
     }
 
 
+@app.get("/api/autoscaler/decisions", dependencies=[Depends(verify_admin_auth)])
+def get_autoscaler_decisions(limit: int = 50):
+    # Recent scale up/down decisions (and deferred ones) with the inputs they were based on
+    return autoscaler.recent_decisions(limit)
+
+
+@app.get("/api/workers/connections", dependencies=[Depends(verify_admin_auth)])
+def get_worker_connections():
+    # Per-worker dispatch latency, error counts and circuit breaker state
+    return worker_clients.stats()
+
+
 @app.post("/api/job-complete")
 def job_complete(payload: JobCompleteSchema, db: Session = Depends(get_db)):
     job = crud.get_job_by_id(db, payload.job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
+    # Terminal reports free the job's worker slot in the same commit as the status change
+    worker_id = job.worker_id
+    slot_released = payload.status in ("completed", "failed") and crud.release_job_slot(db, job.id, worker_id)
     crud.update_job_status(
         db,
         job_id=payload.job_id,
@@ -93,5 +230,16 @@ def job_complete(payload: JobCompleteSchema, db: Session = Depends(get_db)):
         progress=payload.progress or 100,
         error=payload.error
     )
+    job_events.publish(
+        str(payload.job_id), "status", client_id=job.client_id,
+        status=payload.status, progress=payload.progress or 100
+    )
+    if payload.status in ("completed", "failed"):
+        progress_tracker.forget(str(payload.job_id))
+        if slot_released:
+            worker_registry.release(worker_id, str(payload.job_id))
+        else:
+            worker_registry.finish_job(str(payload.job_id))
+        dispatch_wakeup.notify()
 
     return {"success": True, "message": f"Job {payload.job_id} marked as {payload.status}"}
\ No newline at end of file
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from db.models import Client
 from db.session import get_db
 from api.schemas import ClientCreate, ClientOut, ClientUpdate, ClientUpdateSchema
-from api.dependencies import verify_admin_auth, verify_client_auth
+from api.dependencies import verify_admin_auth, verify_client_auth, invalidate_principal
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
@@ -65,5 +65,6 @@ def update_my_client_details(
         setattr(db_client, field, value)
 
     db.commit()
+    invalidate_principal(db_client.client_id)
     db.refresh(db_client)
     return db_client
@@ -4,6 +4,7 @@ from db.session import get_db
 from db import crud
 from api.schemas import S3CredentialCreate, S3CredentialUpdate, S3CredentialResponse
 from api.dependencies import get_current_client_data
+from services.ec2_manager import invalidate_credentials
 
 from typing import Optional
 
@@ -53,4 +54,6 @@ def update_credential(
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Credential not found or access denied")
+    # Cached EC2 clients were built with the old keys/region
+    invalidate_credentials(credential_id)
     return updated
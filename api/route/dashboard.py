@@ -3,9 +3,10 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
 
-from api.dependencies import get_current_client_data
+from api.dependencies import get_current_client_data, verify_admin_auth
 from db.session import get_db
 from db.crud import get_dashboard_summary_data
+from core.response_cache import response_cache, dashboard_tag
 
 router = APIRouter(
     prefix="/dashboard",
@@ -19,9 +20,18 @@ def get_dashboard_data(
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None
 ):
-    return get_dashboard_summary_data(
-        db=db,
-        auth={"is_admin": current_user["is_admin"], "client_id": current_user["client_id"]},
-        date_from=date_from,
-        date_to=date_to
+    auth = {"is_admin": current_user["is_admin"], "client_id": current_user["client_id"]}
+    tenant = None if auth["is_admin"] else auth["client_id"]
+
+    # Operators share one cached summary per tenant and date range; job status changes invalidate it
+    key = ("dashboard", tenant, date_from.isoformat() if date_from else None, date_to.isoformat() if date_to else None)
+    return response_cache.get_or_load(
+        key,
+        lambda: get_dashboard_summary_data(db=db, auth=auth, date_from=date_from, date_to=date_to),
+        tags=[dashboard_tag(tenant)],
     )
+
+
+@router.get("/cache-stats", dependencies=[Depends(verify_admin_auth)])
+def get_cache_stats():
+    return response_cache.stats()
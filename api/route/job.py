@@ -1,24 +1,49 @@
 # controller/api/route/job.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Header
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import or_, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
 from db.models import Job, Client
-from db.session import get_db
-from api.schemas import JobCreateRequest, JobCreateResponse, JobDetailResponse
-from api.dependencies import get_current_client_data
+from db.session import get_db, SessionLocal
+from db.async_session import get_async_db
+from api.schemas import (
+    JobCreateRequest, JobCreateResponse, JobDetailResponse, JobBatchCreateResponse, JobBatchItemResult,
+    JobAudioTrackResponse, JobSubtitleTrackResponse
+)
+from api.dependencies import get_current_client_data, get_current_client_data_async
 from datetime import datetime, timezone
+import asyncio
+import base64
+import json
 import uuid
 from typing import List, Optional
 
-from db.crud import create_job_with_tracks
+from db import async_crud, crud
+from config.settings import settings
+from core.progress_cache import progress_tracker
+from core.job_events import job_events
+from core.response_cache import response_cache, job_tag
 
 router = APIRouter()
 
+
+def with_live_progress(job) -> JobDetailResponse:
+    # Progress reported since the last DB write (or since the detail was cached) is only held in memory
+    detail = job if isinstance(job, JobDetailResponse) else JobDetailResponse.model_validate(job)
+    latest = progress_tracker.get(detail.job_id)
+    if latest and latest.progress != detail.progress:
+        detail = detail.model_copy(update={"progress": latest.progress})
+    return detail
+
 # Create Job
 @router.post("/api/jobcreate", response_model=JobCreateResponse)
-def create_job(
+async def create_job(
     request: JobCreateRequest,
-    db: Session = Depends(get_db),
-    auth=Depends(get_current_client_data)
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_client_data_async)
 ):
     client_id = auth["client_id"]
 
@@ -27,15 +52,13 @@ def create_job(
             raise HTTPException(status_code=400, detail="Admin must provide client_id")
 
         # Validate client_id exists and is active
-        client = db.query(Client).filter_by(client_id=request.client_id, is_active=True).first()
-        if not client:
+        if not await async_crud.client_is_active(db, request.client_id):
             raise HTTPException(status_code=404, detail="Provided client_id does not exist or is inactive.")
 
         client_id = request.client_id  # Override client_id from request
 
     # Check for duplicates
-    existing = db.query(Job).filter_by(content_id=request.content_id, client_id=client_id).first()
-    if existing:
+    if await async_crud.job_exists_for_content(db, client_id, request.content_id):
         raise HTTPException(status_code=400, detail="Job with this content_id already exists")
 
     job_id = f"{datetime.utcnow().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8]}"
@@ -44,7 +67,7 @@ def create_job(
         job_data = request.model_dump(exclude={"audio_tracks", "subtitle_tracks"})
         job_data["client_id"] = client_id
 
-        db_job = create_job_with_tracks(
+        db_job = await async_crud.create_job_with_tracks(
             db=db,
             job_id=job_id,
             job_data=job_data,
@@ -58,64 +81,271 @@ def create_job(
             message="Job queued successfully"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
 
+# Create many jobs in one request
+@router.post("/api/jobs/batch", response_model=JobBatchCreateResponse)
+def create_jobs_batch(
+    requests: List[JobCreateRequest],
+    db: Session = Depends(get_db),
+    auth=Depends(get_current_client_data)
+):
+    if len(requests) > settings.MAX_JOB_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.MAX_JOB_BATCH_SIZE} jobs")
+
+    results = [None] * len(requests)
+
+    def reject(index, message):
+        results[index] = JobBatchItemResult(
+            index=index, content_id=requests[index].content_id, status="rejected", message=message
+        )
+
+    # Resolve the owning client of every item
+    owners = {}
+    if auth["is_admin"]:
+        requested = {r.client_id for r in requests if r.client_id}
+        active = {
+            cid for (cid,) in db.query(Client.client_id)
+            .filter(Client.client_id.in_(requested), Client.is_active == True)
+            .all()
+        } if requested else set()
+        for index, request in enumerate(requests):
+            if not request.client_id:
+                reject(index, "Admin must provide client_id")
+            elif request.client_id not in active:
+                reject(index, "Provided client_id does not exist or is inactive.")
+            else:
+                owners[index] = request.client_id
+    else:
+        owners = {index: auth["client_id"] for index in range(len(requests))}
+
+    # One set-based duplicate check for the whole batch, plus duplicates inside the batch
+    existing = crud.find_existing_jobs(db, list({(cid, requests[i].content_id) for i, cid in owners.items()}))
+    seen = set()
+    entries = []
+    for index, client_id in owners.items():
+        request = requests[index]
+        key = (client_id, request.content_id)
+        if key in existing or key in seen:
+            reject(index, "Job with this content_id already exists")
+            continue
+        seen.add(key)
+
+        job_id = f"{datetime.utcnow().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8]}"
+        job_data = request.model_dump(exclude={"audio_tracks", "subtitle_tracks"})
+        job_data["client_id"] = client_id
+        entries.append((index, job_id, job_data, request.audio_tracks or [], request.subtitle_tracks or []))
+
+    try:
+        crud.create_jobs_bulk(db, [entry[1:] for entry in entries])
+        for index, job_id, *_ in entries:
+            results[index] = JobBatchItemResult(
+                index=index, content_id=requests[index].content_id, job_id=job_id,
+                status="queued", message="Job queued successfully"
+            )
+    except Exception as e:
+        for index, *_ in entries:
+            reject(index, f"Failed to queue job: {str(e)}")
+
+    queued = sum(1 for r in results if r.status == "queued")
+    return JobBatchCreateResponse(queued=queued, rejected=len(results) - queued, results=results)
+
 # Get Job by Job ID
 @router.get("/api/job/{job_id}", response_model=JobDetailResponse)
-def get_job_by_id(
+async def get_job_by_id(
     job_id: str,
-    db: Session = Depends(get_db),
-    auth=Depends(get_current_client_data)
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_client_data_async)
 ):
-    job = db.query(Job).filter(Job.job_id == job_id).first()
-    if not job:
+    async def load():
+        job = await async_crud.get_job_detail(db, job_id)
+        return JobDetailResponse.model_validate(job) if job else None
+
+    # Cached until the job's status changes; progress is overlaid from memory below
+    detail = await response_cache.aget_or_load(("job", job_id), load, tags=[job_tag(job_id)])
+    if not detail:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    if not auth["is_admin"] and job.client_id != auth["client_id"]:
+    if not auth["is_admin"] and detail.client_id != auth["client_id"]:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    return job
+    return with_live_progress(detail)
+
+def encode_cursor(job) -> str:
+    raw = json.dumps([job.created_at.isoformat(), job.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+JOB_LIST_FIELDS = set(JobDetailResponse.model_fields)
+TRACK_FIELDS = {"audio_tracks": JobAudioTrackResponse, "subtitle_tracks": JobSubtitleTrackResponse}
+# Largest page /api/jobs returns
+JOB_LIST_MAX_LIMIT = 500
+
+
+def project_job(job, fields: list) -> dict:
+    # Builds the response from loaded attributes only, so unloaded columns are never lazy-loaded
+    item = {}
+    for field in fields:
+        if field in TRACK_FIELDS:
+            item[field] = [TRACK_FIELDS[field].model_validate(t).model_dump() for t in getattr(job, field)]
+        else:
+            item[field] = getattr(job, field)
+    if "progress" in item:
+        latest = progress_tracker.get(job.job_id)
+        if latest and latest.dirty:
+            item["progress"] = latest.progress
+    return item
+
 
 # List Jobs (Optional filters via query params)
-@router.get("/api/jobs", response_model=List[JobDetailResponse])
-def list_jobs(
-    db: Session = Depends(get_db),
-    auth=Depends(get_current_client_data),
+# Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+@router.get("/api/jobs", response_model=None, responses={200: {"model": List[JobDetailResponse]}})
+async def list_jobs(
+    db: AsyncSession = Depends(get_async_db),
+    auth=Depends(get_current_client_data_async),
     job_id: Optional[str] = None,
     status: Optional[str] = None,
     progress: Optional[int] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     order: Optional[str] = None,
-    limit: int = 20,
-    offset: int = 0
+    limit: int = Query(20, ge=1, le=JOB_LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. job_id,status,progress")
 ):
-    query = db.query(Job)
+    query = select(Job)
 
     if not auth["is_admin"]:
-        query = query.filter(Job.client_id == auth["client_id"])
+        query = query.where(Job.client_id == auth["client_id"])
 
     if job_id:
-        query = query.filter(Job.job_id == job_id)
+        query = query.where(Job.job_id == job_id)
 
     if status:
-        query = query.filter(Job.status == status)
+        query = query.where(Job.status == status)
 
     if progress is not None:
-        query = query.filter(Job.progress >= progress)
+        query = query.where(Job.progress >= progress)
 
     if date_from:
-        query = query.filter(Job.created_at >= date_from)
+        query = query.where(Job.created_at >= date_from)
 
     if date_to:
-        query = query.filter(Job.created_at <= date_to)
+        query = query.where(Job.created_at <= date_to)
+
+    # Projection: only load the requested columns, and tracks only when asked for
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(JOB_LIST_FIELDS)
+    unknown = set(selected) - JOB_LIST_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    columns = {f for f in selected if f not in TRACK_FIELDS} | {"id", "job_id", "created_at"}
+    query = query.options(load_only(*[getattr(Job, c) for c in columns]))
+    for field in TRACK_FIELDS:
+        if field in selected:
+            query = query.options(selectinload(getattr(Job, field)))
+
+    # Keyset pagination on (created_at, id); offset is kept for existing callers
+    ascending = order == "asc"
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        if ascending:
+            query = query.where(or_(Job.created_at > created_at, and_(Job.created_at == created_at, Job.id > pk)))
+        else:
+            query = query.where(or_(Job.created_at < created_at, and_(Job.created_at == created_at, Job.id < pk)))
+    elif offset:
+        query = query.offset(offset)
 
     # Order by creation date
-    if order == "asc":
-        query = query.order_by(Job.created_at.asc())
+    if ascending:
+        query = query.order_by(Job.created_at.asc(), Job.id.asc())
     else:
-        query = query.order_by(Job.created_at.desc())  # default to descending
+        query = query.order_by(Job.created_at.desc(), Job.id.desc())  # default to descending
+
+    jobs = (await db.execute(query.limit(limit))).scalars().all()
+
+    headers = {}
+    if jobs and len(jobs) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(jobs[-1])
+    if fields:
+        content = [project_job(job, selected) for job in jobs]
+    else:
+        content = [with_live_progress(job).model_dump() for job in jobs]
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
+
+def _open_stream(request: Request, x_client_id, x_license_key, job_ids: Optional[set]):
+    # Uses a short-lived session instead of Depends(get_db) so a long-lived
+    # stream does not hold a pooled connection open
+    db = SessionLocal()
+    try:
+        auth = get_current_client_data(request, x_client_id, x_license_key, db)
+        if not job_ids:
+            return auth, []
+
+        jobs = db.query(Job).filter(Job.job_id.in_(job_ids)).all()
+        if len(jobs) != len(job_ids):
+            raise HTTPException(status_code=404, detail="Job not found")
+        if not auth["is_admin"] and any(job.client_id != auth["client_id"] for job in jobs):
+            raise HTTPException(status_code=403, detail="Access denied")
+
+        snapshot = []
+        for job in jobs:
+            job_events.remember_owner(job.job_id, job.client_id)
+            detail = with_live_progress(job)
+            snapshot.append({
+                "type": "status",
+                "job_id": job.job_id,
+                "client_id": job.client_id,
+                "status": detail.status,
+                "progress": detail.progress,
+            })
+        return auth, snapshot
+    finally:
+        db.close()
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# Stream job status/progress changes as Server-Sent Events
+@router.get("/api/jobs/stream")
+async def stream_jobs(
+    request: Request,
+    job_id: Optional[List[str]] = Query(None, description="Jobs to follow; omit to follow all of your jobs"),
+    x_client_id: Optional[str] = Header(None, convert_underscores=False),
+    x_license_key: Optional[str] = Header(None, convert_underscores=False),
+):
+    job_ids = set(job_id) if job_id else None
+    auth, snapshot = await run_in_threadpool(_open_stream, request, x_client_id, x_license_key, job_ids)
+    subscription = job_events.subscribe(auth["client_id"], auth["is_admin"], job_ids)
+
+    async def event_stream():
+        try:
+            for event in snapshot:
+                yield _sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.JOB_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            job_events.unsubscribe(subscription)
 
-    jobs = query.offset(offset).limit(limit).all()
-    return jobs
\ No newline at end of file
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -81,6 +81,18 @@ class JobCreateResponse(BaseModel):
     status: str
     message: str
 
+class JobBatchItemResult(BaseModel):
+    index: int
+    content_id: str
+    job_id: Optional[str] = None
+    status: str  # "queued" or "rejected"
+    message: str
+
+class JobBatchCreateResponse(BaseModel):
+    queued: int
+    rejected: int
+    results: List[JobBatchItemResult]
+
 class JobCompleteSchema(BaseModel):
     job_id: UUID
     status: str = Field(..., example="completed")  # e.g., "completed", "failed"
@@ -150,6 +162,7 @@ class WorkerInstance(BaseModel):
     current_jobs: int
     max_jobs: int
     is_active: bool
+    state: Optional[str] = None
     last_used: Optional[datetime]
     last_active: Optional[datetime]
 
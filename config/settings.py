@@ -19,6 +19,12 @@ class Settings(BaseSettings):
     # DATABASE_URL: ClassVar[str] = f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{quote_plus(os.getenv('DB_PASSWORD', 'unisys@123'))}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'drm_system')}"
     DATABASE_URL: ClassVar[str] = f"mysql+pymysql://{os.getenv('DB_USER', 'root')}:{quote_plus(os.getenv('DB_PASSWORD', ''))}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'drm_system')}"
 
+    # Async engine for the hot request paths (db/async_session.py); derived from DATABASE_URL
+    # with the aiomysql driver unless set. Pool size and overflow are per process
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    ASYNC_DB_POOL_SIZE: int = int(os.getenv("ASYNC_DB_POOL_SIZE", 10))
+    ASYNC_DB_MAX_OVERFLOW: int = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20))
+
     OUTPUT_DIR: Path = Path("output")
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", 9000))
@@ -28,9 +34,118 @@ class Settings(BaseSettings):
 
     MAX_JOBS_PER_WORKER : int = int(os.getenv("MAX_JOBS_PER_WORKER", 3))
     POLL_INTERVAL: int = int(os.getenv("POLL_INTERVAL", 5))
+    # Upper bound for the safety-net poll while the queue stays empty
+    MAX_POLL_INTERVAL: int = int(os.getenv("MAX_POLL_INTERVAL", 60))
 
     IS_PRODUCTION: bool = bool(os.getenv("IS_PRODUCTION", False))
 
+    # Dispatch fan-out: per-request deadline (seconds) and per-worker in-flight cap (= keep-alive connections per worker)
+    DISPATCH_TIMEOUT: float = float(os.getenv("DISPATCH_TIMEOUT", 10))
+    DISPATCH_MAX_IN_FLIGHT_PER_WORKER: int = int(os.getenv("DISPATCH_MAX_IN_FLIGHT_PER_WORKER", 4))
+    # Idle keep-alive connections to a worker are closed after this many seconds
+    WORKER_KEEPALIVE_EXPIRY: float = float(os.getenv("WORKER_KEEPALIVE_EXPIRY", 60))
+
+    # Per-worker circuit breaker: consecutive failures before a worker leaves placement,
+    # first backoff (doubles per failed probe) and its cap, and the half-open probe tick (seconds)
+    WORKER_BREAKER_FAILURES: int = int(os.getenv("WORKER_BREAKER_FAILURES", 3))
+    WORKER_BREAKER_BACKOFF: float = float(os.getenv("WORKER_BREAKER_BACKOFF", 10))
+    WORKER_BREAKER_MAX_BACKOFF: float = float(os.getenv("WORKER_BREAKER_MAX_BACKOFF", 300))
+    WORKER_PROBE_INTERVAL: float = float(os.getenv("WORKER_PROBE_INTERVAL", 2))
+
+    # Worker lifecycle reconciler: tick interval, boot deadline and health probe timeout (seconds)
+    WORKER_RECONCILE_INTERVAL: int = int(os.getenv("WORKER_RECONCILE_INTERVAL", 5))
+    WORKER_BOOT_TIMEOUT: int = int(os.getenv("WORKER_BOOT_TIMEOUT", 600))
+    WORKER_HEALTH_TIMEOUT: float = float(os.getenv("WORKER_HEALTH_TIMEOUT", 2))
+    # Full fleet check against EC2 (one DescribeInstances per credential), in seconds
+    WORKER_FLEET_SYNC_INTERVAL: int = int(os.getenv("WORKER_FLEET_SYNC_INTERVAL", 60))
+
+    # Worker placement: least_loaded, best_fit, spread or balanced; registry reload interval (seconds)
+    WORKER_PLACEMENT_POLICY: str = os.getenv("WORKER_PLACEMENT_POLICY", "least_loaded")
+    WORKER_REGISTRY_REFRESH: int = int(os.getenv("WORKER_REGISTRY_REFRESH", 15))
+
+    # Fair queuing: per-client weights ("client_a:3,client_b:0.5"), weight multiplier for paid jobs,
+    # full backlog reload interval (seconds) and max queued jobs mirrored in memory
+    CLIENT_WEIGHTS: str = os.getenv("CLIENT_WEIGHTS", "")
+    PAID_JOB_BOOST: float = float(os.getenv("PAID_JOB_BOOST", 2))
+    SCHEDULER_RESYNC_INTERVAL: int = int(os.getenv("SCHEDULER_RESYNC_INTERVAL", 60))
+    SCHEDULER_MAX_BACKLOG: int = int(os.getenv("SCHEDULER_MAX_BACKLOG", 50000))
+
+    # Scheduling order: "fair" (weighted fair queuing) or "sjf" (shortest expected job first)
+    SCHEDULER_ORDER: str = os.getenv("SCHEDULER_ORDER", "fair")
+    # Job cost estimate: fallback duration (seconds), extra cost per audio/subtitle track,
+    # and how often per-client duration history is reloaded (seconds)
+    DEFAULT_JOB_DURATION: float = float(os.getenv("DEFAULT_JOB_DURATION", 1800))
+    AUDIO_TRACK_COST_FACTOR: float = float(os.getenv("AUDIO_TRACK_COST_FACTOR", 0.15))
+    SUBTITLE_TRACK_COST_FACTOR: float = float(os.getenv("SUBTITLE_TRACK_COST_FACTOR", 0.02))
+    JOB_COST_HISTORY_REFRESH: int = int(os.getenv("JOB_COST_HISTORY_REFRESH", 300))
+
+    # Largest accepted /api/jobs/batch request
+    MAX_JOB_BATCH_SIZE: int = int(os.getenv("MAX_JOB_BATCH_SIZE", 5000))
+
+    # job_logs write-behind buffer: max buffered rows, rows per INSERT, max delay before a flush (seconds)
+    JOB_LOG_BUFFER_SIZE: int = int(os.getenv("JOB_LOG_BUFFER_SIZE", 10000))
+    JOB_LOG_BATCH_SIZE: int = int(os.getenv("JOB_LOG_BATCH_SIZE", 500))
+    JOB_LOG_FLUSH_INTERVAL: float = float(os.getenv("JOB_LOG_FLUSH_INTERVAL", 1))
+
+    # Progress fast path: persist to jobs after moving this many percent or after this many seconds
+    PROGRESS_PERSIST_STEP: int = int(os.getenv("PROGRESS_PERSIST_STEP", 10))
+    PROGRESS_PERSIST_INTERVAL: float = float(os.getenv("PROGRESS_PERSIST_INTERVAL", 30))
+
+    # Seconds between keep-alive comments on /api/jobs/stream
+    JOB_STREAM_KEEPALIVE: float = float(os.getenv("JOB_STREAM_KEEPALIVE", 15))
+
+    # Read cache for /dashboard and /api/job/{id}: entry lifetime (seconds) and max entries
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", 5))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+
+    # Authenticated principal cache: entry lifetime (seconds) and max entries
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+
+    # HTTP connections each cached EC2 client may keep open, and how long (seconds) cached
+    # EC2 clients are used before the credential is re-read from the DB
+    EC2_MAX_POOL_CONNECTIONS: int = int(os.getenv("EC2_MAX_POOL_CONNECTIONS", 10))
+    EC2_CLIENT_TTL: float = float(os.getenv("EC2_CLIENT_TTL", 300))
+
+    # Autoscaler: evaluation interval (seconds), fleet bounds (0 = whole fleet), how fast queued
+    # work should be drained (seconds) and max workers started/drained per decision
+    AUTOSCALER_INTERVAL: int = int(os.getenv("AUTOSCALER_INTERVAL", 15))
+    AUTOSCALER_MIN_WORKERS: int = int(os.getenv("AUTOSCALER_MIN_WORKERS", 0))
+    AUTOSCALER_MAX_WORKERS: int = int(os.getenv("AUTOSCALER_MAX_WORKERS", 0))
+    AUTOSCALER_TARGET_DRAIN_SECONDS: float = float(os.getenv("AUTOSCALER_TARGET_DRAIN_SECONDS", 1800))
+    AUTOSCALER_MAX_STEP: int = int(os.getenv("AUTOSCALER_MAX_STEP", 2))
+    # Autoscaler hysteresis (seconds): cooldowns after each kind of action, how long demand must stay
+    # below capacity before scaling down, minimum time a worker stays up, and idle time before draining
+    AUTOSCALER_SCALE_UP_COOLDOWN: int = int(os.getenv("AUTOSCALER_SCALE_UP_COOLDOWN", 60))
+    AUTOSCALER_SCALE_DOWN_COOLDOWN: int = int(os.getenv("AUTOSCALER_SCALE_DOWN_COOLDOWN", 300))
+    AUTOSCALER_SCALE_DOWN_DELAY: int = int(os.getenv("AUTOSCALER_SCALE_DOWN_DELAY", 300))
+    AUTOSCALER_MIN_LIFETIME: int = int(os.getenv("AUTOSCALER_MIN_LIFETIME", 900))
+    WORKER_IDLE_TIMEOUT: int = int(os.getenv("WORKER_IDLE_TIMEOUT", 300))
+
+    # Job leases: seconds a claim stays valid without a heartbeat, attempts before a job is failed,
+    # and how often expired leases are reaped (seconds)
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", 120))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    LEASE_REAPER_INTERVAL: int = int(os.getenv("LEASE_REAPER_INTERVAL", 15))
+
+    # Controller processes: API workers started by start_controller.py in production, and the
+    # leader lease that picks the one process running the background loops (seconds). Each
+    # process opens its own sync and async DB pools, so keep workers x (pool + overflow) of
+    # both well under MySQL's max_connections when raising it
+    CONTROLLER_WORKERS: int = int(os.getenv("CONTROLLER_WORKERS", 2))
+    LEADER_LEASE_SECONDS: int = int(os.getenv("LEADER_LEASE_SECONDS", 15))
+    LEADER_RENEW_INTERVAL: float = float(os.getenv("LEADER_RENEW_INTERVAL", 5))
+    # "leader": the elected process dispatches for the whole fleet. "partitioned": every process
+    # dispatches, reconciles and autoscales the workers it owns (rendezvous hash of worker id over
+    # live members), while lease reaping stays with the leader. Membership heartbeat TTL/interval (seconds)
+    DISPATCH_MODE: str = os.getenv("DISPATCH_MODE", "leader")
+    MEMBER_LEASE_SECONDS: int = int(os.getenv("MEMBER_LEASE_SECONDS", 15))
+    MEMBER_HEARTBEAT_INTERVAL: float = float(os.getenv("MEMBER_HEARTBEAT_INTERVAL", 5))
+    # UDP address each process listens on for cluster bus messages (dispatch wakeups, job events,
+    # cache invalidations); use a reachable interface (not 127.0.0.1) when controllers run on several hosts
+    CONTROLLER_WAKEUP_HOST: str = os.getenv("CONTROLLER_WAKEUP_HOST", "127.0.0.1")
+    CONTROLLER_WAKEUP_PORT: int = int(os.getenv("CONTROLLER_WAKEUP_PORT", 0))
+
     # WORKERPORT: int = int(os.getenv("WORKERPORT", 9000))
     WORKERPORT: int = int(os.getenv("WORKERPORT", 10200))
 
@@ -0,0 +1,92 @@
+# controller/core/cluster_bus.py
+from typing import Callable, Optional
+import json
+import logging
+import socket
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Largest UDP payload; messages are small JSON objects well below it
+MAX_DATAGRAM = 65507
+
+
+def parse_addresses(addresses) -> tuple:
+    # "host:port" strings -> (host, port) tuples for sendto()
+    remotes = []
+    for address in addresses:
+        host, _, port = address.rpartition(":")
+        remotes.append((host, int(port)))
+    return tuple(remotes)
+
+
+class ClusterBus:
+    """
+    Relays in-process notifications between controller processes (uvicorn
+    workers and hosts) as small JSON datagrams over UDP: dispatch wakeups,
+    job events for the streaming endpoint and cache invalidations.
+
+    Every process listens (listen()) and learns the other processes'
+    addresses from controller membership (set_peers()). publish() sends a
+    topic to every peer; the receiving process hands the message to the
+    handler subscribed to that topic. Delivery is best effort: a lost
+    datagram is covered by the TTL of the affected cache, or by the next
+    poll for wakeups.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._peers = ()
+        self._socket: Optional[socket.socket] = None
+
+    def subscribe(self, topic: str, handler: Callable):
+        # handler(message: dict) runs on the bus's receive thread
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def publish(self, topic: str, **payload):
+        self.send(topic, self._peers, **payload)
+
+    def send(self, topic: str, remotes, **payload):
+        if self._socket is None or not remotes:
+            return
+        data = json.dumps({"topic": topic, **payload}, default=str).encode()
+        for remote in remotes:
+            try:
+                self._socket.sendto(data, remote)
+            except OSError as e:
+                logger.debug(f"Cluster message {topic} to {remote} failed: {e}")
+
+    def listen(self, host: str, port: int = 0) -> str:
+        # Binds the bus socket (port 0 picks a free one) and returns "host:port" to advertise
+        if self._socket is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind((host, port))
+            self._socket = sock
+            threading.Thread(target=self._receive, daemon=True).start()
+        bound_host, bound_port = self._socket.getsockname()
+        return f"{bound_host}:{bound_port}"
+
+    def set_peers(self, addresses):
+        # The other live controller processes, as "host:port"
+        self._peers = parse_addresses(addresses)
+
+    def _receive(self):
+        while True:
+            try:
+                data = self._socket.recv(MAX_DATAGRAM)
+            except OSError:
+                return
+            try:
+                message = json.loads(data)
+                topic = message.pop("topic")
+            except (ValueError, KeyError, AttributeError):
+                logger.debug("Dropped malformed cluster message")
+                continue
+            for handler in self._handlers.get(topic, ()):
+                try:
+                    handler(message)
+                except Exception as e:
+                    logger.error(f"Cluster message handler for {topic} failed: {e}")
+
+
+cluster_bus = ClusterBus()
@@ -0,0 +1,43 @@
+# controller/core/dispatch_signal.py
+from typing import Optional
+import threading
+
+from core.cluster_bus import ClusterBus, cluster_bus, parse_addresses
+
+
+class DispatchWakeup:
+    """
+    Wakes the dispatch loop as soon as there is something to do (a job was
+    queued or a running job freed its slot) instead of waiting for the next poll.
+
+    With several controller processes only the leader dispatches (or, when
+    partitioned, every member does). notify() also sends a "wakeup" message
+    over the cluster bus to the processes that dispatch (set_remote() /
+    set_remotes()), so a job queued through any process wakes their loops.
+    """
+
+    def __init__(self, bus: ClusterBus = cluster_bus):
+        self.bus = bus
+        self._event = threading.Event()
+        self._remotes = ()
+        bus.subscribe("wakeup", lambda message: self._event.set())
+
+    def notify(self):
+        self._event.set()
+        self.bus.send("wakeup", self._remotes)
+
+    def wait(self, timeout: float) -> bool:
+        # Returns True when woken by notify(), False when the timeout elapsed
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return woken
+
+    def set_remote(self, address: Optional[str]):
+        # Leader's "host:port"; None while this process is the leader (or none is known)
+        self.set_remotes([address] if address else [])
+
+    def set_remotes(self, addresses: list):
+        self._remotes = parse_addresses(addresses)
+
+
+dispatch_wakeup = DispatchWakeup()
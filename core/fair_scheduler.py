@@ -0,0 +1,224 @@
+# controller/core/fair_scheduler.py
+from collections import deque
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable, Optional
+import heapq
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from db import models
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PendingJob:
+    id: int
+    job_id: str
+    client_id: str
+    is_paid: bool
+    content_duration: Optional[int] = None
+    audio_tracks: int = 0
+    subtitle_tracks: int = 0
+    cost: float = 1.0
+
+
+class _Flow:
+    __slots__ = ("key", "weight", "jobs", "finish", "head_start")
+
+    def __init__(self, key, weight: float):
+        self.key = key
+        self.weight = weight
+        self.jobs = deque()
+        self.finish = 0.0
+        self.head_start = 0.0
+
+
+def parse_client_weights(raw: str) -> dict:
+    # "client_a:3,client_b:0.5" -> {"client_a": 3.0, "client_b": 0.5}. Malformed entries and
+    # weights that are not positive are skipped (those clients keep the default weight of 1)
+    weights = {}
+    for item in (raw or "").split(","):
+        if not item.strip():
+            continue
+        client_id, _, weight = item.partition(":")
+        client_id = client_id.strip()
+        try:
+            value = float(weight)
+        except ValueError:
+            value = None
+        if not client_id or value is None or not math.isfinite(value) or value <= 0:
+            logger.warning(f"Ignoring CLIENT_WEIGHTS entry {item.strip()!r}: expected client_id:positive_weight")
+            continue
+        weights[client_id] = value
+    return weights
+
+
+class FairScheduler:
+    """
+    Weighted fair queuing over queued jobs, one flow per (client_id, is_paid).
+
+    Each flow's head job gets a virtual finish tag of
+    max(virtual_time, flow.finish) + cost / weight and select() always takes
+    the smallest tag, so a client with thousands of queued jobs cannot starve
+    the others. Paid jobs form their own flow with the client weight
+    multiplied by `paid_boost`. With order="sjf" the tags are ignored and
+    the job with the lowest expected cost is always taken first.
+
+    Queued rows are mirrored in memory: sync() only reads rows newer than the
+    last one seen, with a full reload every `resync_interval` seconds to pick
+    up jobs that were requeued elsewhere.
+    """
+
+    def __init__(
+        self,
+        client_weights: Optional[dict] = None,
+        paid_boost: float = settings.PAID_JOB_BOOST,
+        cost_fn: Optional[Callable] = None,
+        resync_interval: int = settings.SCHEDULER_RESYNC_INTERVAL,
+        max_backlog: int = settings.SCHEDULER_MAX_BACKLOG,
+        order: str = settings.SCHEDULER_ORDER,
+    ):
+        if order not in ("fair", "sjf"):
+            raise ValueError(f"Unknown scheduler order: {order}")
+        self.order = order
+        self.client_weights = client_weights if client_weights is not None else parse_client_weights(settings.CLIENT_WEIGHTS)
+        if paid_boost <= 0:
+            # Paid flows would get a zero or negative weight
+            logger.warning(f"Ignoring PAID_JOB_BOOST={paid_boost}: must be positive, using 1")
+            paid_boost = 1.0
+        self.paid_boost = paid_boost
+        self.cost_fn = cost_fn or (lambda job: 1.0)
+        self.resync_interval = resync_interval
+        self.max_backlog = max_backlog
+
+        self._lock = threading.Lock()
+        self._flows = {}
+        self._heap = []
+        self._seq = count()
+        self._known = set()
+        self._virtual_time = 0.0
+        self._last_seen_id = 0
+        self._synced_at = None
+
+    def weight_for(self, client_id: str, is_paid: bool) -> float:
+        weight = self.client_weights.get(client_id, 1.0)
+        return weight * self.paid_boost if is_paid else weight
+
+    def invalidate(self):
+        # Next sync() reloads the whole backlog
+        with self._lock:
+            self._synced_at = None
+
+    def sync(self, db):
+        full = self._synced_at is None or time.monotonic() - self._synced_at > self.resync_interval
+        audio_count = select(func.count(models.JobAudioTrack.id))\
+            .where(models.JobAudioTrack.job_id == models.Job.job_id).scalar_subquery()
+        subtitle_count = select(func.count(models.JobSubtitleTrack.id))\
+            .where(models.JobSubtitleTrack.job_id == models.Job.job_id).scalar_subquery()
+        query = db.query(
+            models.Job.id, models.Job.job_id, models.Job.client_id, models.Job.is_paid,
+            models.Job.content_duration, audio_count.label("audio_tracks"), subtitle_count.label("subtitle_tracks")
+        ).filter(models.Job.status == "queued")
+
+        with self._lock:
+            if full:
+                rows = query.order_by(models.Job.created_at.asc(), models.Job.id.asc()).limit(self.max_backlog).all()
+                self._reset_backlog()
+                self._synced_at = time.monotonic()
+            else:
+                room = self.max_backlog - len(self._known)
+                if room <= 0:
+                    return
+                rows = query.filter(models.Job.id > self._last_seen_id).order_by(models.Job.id.asc()).limit(room).all()
+
+            for row in rows:
+                self._enqueue(PendingJob(
+                    id=row.id,
+                    job_id=row.job_id,
+                    client_id=row.client_id,
+                    is_paid=bool(row.is_paid),
+                    content_duration=row.content_duration,
+                    audio_tracks=row.audio_tracks or 0,
+                    subtitle_tracks=row.subtitle_tracks or 0,
+                ))
+
+    def select(self, limit: int) -> list:
+        picked = []
+        with self._lock:
+            if self.order == "sjf":
+                while len(picked) < limit and self._heap:
+                    job = heapq.heappop(self._heap)[-1]
+                    self._known.discard(job.job_id)
+                    picked.append(job)
+                return picked
+
+            while len(picked) < limit and self._heap:
+                finish, _, key = heapq.heappop(self._heap)
+                flow = self._flows[key]
+                if not flow.jobs or flow.finish != finish:
+                    continue  # stale heap entry
+                job = flow.jobs.popleft()
+                self._known.discard(job.job_id)
+                self._virtual_time = max(self._virtual_time, flow.head_start)
+                picked.append(job)
+                if flow.jobs:
+                    self._tag_head(flow)
+        return picked
+
+    def requeue(self, jobs: list):
+        # Put selected-but-undispatched jobs back at the front of their flows
+        with self._lock:
+            for job in reversed(jobs):
+                if job.job_id in self._known:
+                    continue
+                self._known.add(job.job_id)
+                if self.order == "sjf":
+                    heapq.heappush(self._heap, (job.cost, next(self._seq), job))
+                    continue
+                flow = self._flow_for(job)
+                if flow.jobs:
+                    flow.finish = flow.head_start  # undo the current head's tag
+                flow.jobs.appendleft(job)
+                self._tag_head(flow)
+
+    def _reset_backlog(self):
+        for flow in self._flows.values():
+            if flow.jobs:
+                flow.finish = flow.head_start
+            flow.jobs.clear()
+        self._heap = []
+        self._known.clear()
+
+    def _flow_for(self, job: PendingJob) -> _Flow:
+        key = (job.client_id, job.is_paid)
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = _Flow(key, self.weight_for(job.client_id, job.is_paid))
+            self._flows[key] = flow
+        return flow
+
+    def _enqueue(self, job: PendingJob):
+        if job.job_id in self._known:
+            return
+        self._known.add(job.job_id)
+        self._last_seen_id = max(self._last_seen_id, job.id)
+        job.cost = self.cost_fn(job)
+        if self.order == "sjf":
+            heapq.heappush(self._heap, (job.cost, next(self._seq), job))
+            return
+        flow = self._flow_for(job)
+        flow.jobs.append(job)
+        if len(flow.jobs) == 1:
+            self._tag_head(flow)
+
+    def _tag_head(self, flow: _Flow):
+        job = flow.jobs[0]
+        flow.head_start = max(self._virtual_time, flow.finish)
+        flow.finish = flow.head_start + job.cost / flow.weight
+        heapq.heappush(self._heap, (flow.finish, next(self._seq), flow.key))
@@ -0,0 +1,145 @@
+# controller/core/job_events.py
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
+import logging
+import threading
+
+from db.session import SessionLocal
+from db import models
+from core.cluster_bus import ClusterBus, cluster_bus
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, loop, client_id: str, is_admin: bool, job_ids: Optional[set], queue_size: int):
+        self.loop = loop
+        self.client_id = client_id
+        self.is_admin = is_admin
+        self.job_ids = job_ids
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    @property
+    def needs_owner(self) -> bool:
+        return self.job_ids is None and not self.is_admin
+
+    def matches(self, event: dict) -> bool:
+        if self.job_ids is not None:
+            return event["job_id"] in self.job_ids
+        return self.is_admin or event.get("client_id") == self.client_id
+
+    def push(self, event: dict):
+        # Runs on the subscriber's loop; a slow reader loses the oldest deltas, not the newest
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class JobEventBroker:
+    """
+    Fans job status/progress changes out to streaming subscribers.
+    publish() is called from sync request handlers and background threads;
+    events are handed to each subscriber's event loop thread-safely.
+
+    A job's reports may land on any controller process, so every event is
+    also relayed over the cluster bus and delivered (to subscribers and
+    listeners) on the other processes as well.
+    """
+
+    def __init__(self, queue_size: int = 256, owner_cache_size: int = 10000, bus: ClusterBus = cluster_bus):
+        self.queue_size = queue_size
+        self.owner_cache_size = owner_cache_size
+        self.bus = bus
+        self._subscriptions = set()
+        self._listeners = []
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+        bus.subscribe("job_event", self._on_relayed)
+
+    def subscribe(self, client_id: str, is_admin: bool, job_ids: Optional[set] = None) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), client_id, is_admin, job_ids, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def add_listener(self, callback):
+        # In-process hooks called synchronously for every event, e.g. cache invalidation
+        self._listeners.append(callback)
+
+    def remember_owner(self, job_id: str, client_id: str):
+        with self._lock:
+            self._owners[job_id] = client_id
+            self._owners.move_to_end(job_id)
+            if len(self._owners) > self.owner_cache_size:
+                self._owners.popitem(last=False)
+
+    def publish(self, job_id: str, event_type: str, client_id: Optional[str] = None, **fields):
+        self._deliver(job_id, event_type, client_id, fields)
+        self.bus.publish("job_event", job_id=job_id, event_type=event_type, client_id=client_id, fields=fields)
+
+    def _on_relayed(self, message: dict):
+        # An event published on another controller process
+        self._deliver(message["job_id"], message["event_type"], message.get("client_id"), message.get("fields") or {})
+
+    def _deliver(self, job_id: str, event_type: str, client_id: Optional[str], fields: dict):
+        for listener in self._listeners:
+            try:
+                listener(job_id, event_type, client_id, fields)
+            except Exception as e:
+                logger.error(f"Job event listener failed for {job_id}: {e}")
+
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+
+        if client_id:
+            self.remember_owner(job_id, client_id)
+        elif any(s.needs_owner for s in subscriptions):
+            client_id = self._owner_of(job_id)
+
+        event = {
+            "type": event_type,
+            "job_id": job_id,
+            "client_id": client_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **fields,
+        }
+        for subscription in subscriptions:
+            if subscription.matches(event):
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.push, event)
+                except RuntimeError:
+                    # Subscriber's loop already closed
+                    self.unsubscribe(subscription)
+
+    def cached_owner(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            return self._owners.get(job_id)
+
+    def _owner_of(self, job_id: str) -> Optional[str]:
+        client_id = self.cached_owner(job_id)
+        if client_id:
+            return client_id
+
+        db = SessionLocal()
+        try:
+            row = db.query(models.Job.client_id).filter(models.Job.job_id == job_id).first()
+        except Exception as e:
+            logger.error(f"Failed to resolve owner of job {job_id}: {e}")
+            return None
+        finally:
+            db.close()
+        if row:
+            self.remember_owner(job_id, row.client_id)
+            return row.client_id
+        return None
+
+
+job_events = JobEventBroker()
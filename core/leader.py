@@ -0,0 +1,133 @@
+# controller/core/leader.py
+from typing import Callable, Optional
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from db.session import SessionLocal
+from db import crud
+from config.settings import settings
+from core.cluster_bus import cluster_bus
+from core.dispatch_signal import dispatch_wakeup
+
+logger = logging.getLogger(__name__)
+
+
+def controller_identity() -> str:
+    # Unique per process, readable in the lease and membership tables
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderElector:
+    """
+    Elects one controller process (across uvicorn workers and hosts) to run
+    the background loops, through a lease row in `controller_leases`.
+
+    Every process renews or tries to take the lease each `renew_interval`
+    seconds. The holder calls `on_elected(term)`; if a renewal is refused,
+    or the DB has been unreachable for so long that the lease may have
+    lapsed, it calls `on_demoted()`. A crashed leader is replaced once its
+    lease expires (`ttl` seconds); a clean shutdown hands over immediately.
+
+    Leadership avoids duplicated work, it is not what keeps jobs safe:
+    claims and slot reservations stay guarded in the database, so a
+    short overlap during failover cannot double-dispatch a job.
+    """
+
+    def __init__(
+        self,
+        name: str = "controller",
+        ttl: int = settings.LEADER_LEASE_SECONDS,
+        renew_interval: float = settings.LEADER_RENEW_INTERVAL,
+        on_elected: Optional[Callable] = None,
+        on_demoted: Optional[Callable] = None,
+        identity: Optional[str] = None,
+        forward_wakeups: bool = True,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = min(renew_interval, ttl / 3)
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.identity = identity or controller_identity()
+        # Off when partitioned: then every member dispatches and membership routes the wakeups
+        self.forward_wakeups = forward_wakeups
+        self.term = None
+        self._renewed_at = None
+        self._address = None
+        self._stopping = threading.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.term is not None
+
+    def run_forever(self):
+        try:
+            self._address = cluster_bus.listen(settings.CONTROLLER_WAKEUP_HOST, settings.CONTROLLER_WAKEUP_PORT)
+        except OSError as e:
+            logger.error(f"Cannot listen for cluster messages: {e}")
+
+        while not self._stopping.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Leader election pass failed: {e}")
+            self._stopping.wait(self.renew_interval)
+
+    def tick(self):
+        db = SessionLocal()
+        try:
+            term = crud.acquire_controller_lease(db, self.name, self.identity, self.ttl, self._address)
+            lease = None if term else crud.get_controller_lease(db, self.name)
+        except Exception as e:
+            logger.error(f"Failed to renew controller lease: {e}")
+            # Without a renewal we cannot know we still hold the lease; stand down before it can lapse
+            if self.is_leader and time.monotonic() - self._renewed_at >= self.ttl - self.renew_interval:
+                self._demote("lease could not be renewed")
+            return
+        finally:
+            db.close()
+
+        if term:
+            self._renewed_at = time.monotonic()
+            if self.term != term:
+                if self.is_leader:
+                    self._demote("leadership term changed")
+                self._elect(term)
+            return
+
+        if self.is_leader:
+            self._demote(f"lease taken by {lease.holder if lease else 'another process'}")
+        # Followers forward dispatch wakeups to whoever leads now
+        if self.forward_wakeups:
+            dispatch_wakeup.set_remote(lease.address if lease else None)
+
+    def stop(self):
+        self._stopping.set()
+        if not self.is_leader:
+            return
+        self._demote("shutting down")
+        db = SessionLocal()
+        try:
+            crud.release_controller_lease(db, self.name, self.identity)
+        except Exception as e:
+            logger.error(f"Failed to release controller lease: {e}")
+        finally:
+            db.close()
+
+    def _elect(self, term: int):
+        self.term = term
+        if self.forward_wakeups:
+            dispatch_wakeup.set_remote(None)
+        print(f"Controller {self.identity} is now the leader (term {term})")
+        if self.on_elected:
+            self.on_elected(term)
+
+    def _demote(self, reason: str):
+        logger.warning(f"Controller {self.identity} stepped down as leader: {reason}")
+        self.term = None
+        if self.on_demoted:
+            self.on_demoted()
@@ -0,0 +1,142 @@
+# controller/core/log_sink.py
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+import logging
+import queue
+import threading
+import time
+
+from db.session import SessionLocal
+from db import models
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobLogSink:
+    """
+    Write-behind buffer for job_logs. Request handlers call record() and
+    return immediately; a background thread inserts the buffered rows with
+    one multi-row INSERT per batch, when `batch_size` rows are waiting or
+    every `flush_interval` seconds.
+
+    The buffer holds at most `max_buffer` rows. When it is full, record()
+    waits up to `put_timeout` seconds and then writes the row itself, so
+    producers slow down instead of memory growing or logs being dropped.
+    `async def` routes use arecord(), which does that waiting and writing
+    in the threadpool instead of on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_buffer: int = settings.JOB_LOG_BUFFER_SIZE,
+        batch_size: int = settings.JOB_LOG_BATCH_SIZE,
+        flush_interval: float = settings.JOB_LOG_FLUSH_INTERVAL,
+        put_timeout: float = 0.5,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="job-log-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        # Flushes everything still buffered before returning
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self._flush(self._drain(self._queue.qsize()))
+
+    def record(self, job_id: str, event_type: str, event_value: str, **fields):
+        self._put(self._row(job_id, event_type, event_value, fields))
+
+    async def arecord(self, job_id: str, event_type: str, event_value: str, **fields):
+        row = self._row(job_id, event_type, event_value, fields)
+        if self._thread:
+            try:
+                self._queue.put_nowait(row)
+                return
+            except queue.Full:
+                pass
+        await run_in_threadpool(self._put, row)
+
+    @staticmethod
+    def _row(job_id: str, event_type: str, event_value: str, fields: dict) -> dict:
+        row = dict(job_id=job_id, event_type=event_type, event_value=event_value, **fields)
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        return row
+
+    def _put(self, row: dict):
+        if not self._thread:
+            self._flush([row])
+            return
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning("Job log buffer full; writing synchronously")
+            self._flush([row])
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            # Keep collecting until the batch is full or the oldest row has waited flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _drain(self, limit: int) -> list:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _flush(self, rows: list):
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.JobLog), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(rows) == 1:
+                logger.error(f"Failed to write job log row for {rows[0].get('job_id')}: {e}")
+                return
+            # One bad row fails the whole multi-row INSERT; retry row by row so only it is lost
+            logger.warning(f"Batch insert of {len(rows)} job log rows failed, retrying row by row: {e}")
+            for row in rows:
+                try:
+                    db.execute(insert(models.JobLog), [row])
+                    db.commit()
+                except Exception as row_error:
+                    db.rollback()
+                    logger.error(f"Failed to write job log row for {row.get('job_id')}: {row_error}")
+        finally:
+            db.close()
+
+
+job_log_sink = JobLogSink()
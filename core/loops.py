@@ -0,0 +1,17 @@
+# controller/core/loops.py
+from typing import Callable
+import threading
+
+
+def start_loop(target: Callable) -> threading.Event:
+    """
+    Runs `target(stopping)` in a daemon thread and returns its stop Event.
+
+    The Event is made here, before the thread starts, and belongs to this
+    run only: a stop right after start still reaches it, and a loop that is
+    restarted (leadership lost and regained) never shares an Event with the
+    run it replaces.
+    """
+    stopping = threading.Event()
+    threading.Thread(target=target, args=(stopping,), daemon=True).start()
+    return stopping
@@ -0,0 +1,120 @@
+# controller/core/membership.py
+from typing import Callable, Optional
+import hashlib
+import logging
+import threading
+import time
+
+from db.session import SessionLocal
+from db import crud
+from config.settings import settings
+from core.cluster_bus import cluster_bus
+from core.dispatch_signal import dispatch_wakeup
+
+logger = logging.getLogger(__name__)
+
+
+def rendezvous_owner(members, worker_id: int) -> Optional[str]:
+    # Highest random weight: each worker goes to the member with the largest hash of (member, worker),
+    # so a join or leave only moves the workers that member gains or loses
+    best, best_score = None, -1
+    for member in members:
+        score = int.from_bytes(hashlib.blake2b(f"{member}|{worker_id}".encode(), digest_size=8).digest(), "big")
+        if score > best_score:
+            best, best_score = member, score
+    return best
+
+
+class ClusterMembership:
+    """
+    Live controller processes. Each process heartbeats its row in
+    `controller_members`; the other members' addresses become the cluster
+    bus peers, so events and cache invalidations reach every process.
+
+    For DISPATCH_MODE=partitioned it also partitions the worker fleet:
+    each process owns the workers that rendezvous-hash to it among the
+    members whose heartbeat has not expired.
+
+    `on_change()` runs whenever the member set changes, so placement,
+    reconciling and autoscaling can move to the new partitions. A member
+    that cannot heartbeat for a whole TTL owns nothing, since the others
+    have already taken its workers over.
+    """
+
+    def __init__(
+        self,
+        identity: str,
+        ttl: int = settings.MEMBER_LEASE_SECONDS,
+        heartbeat_interval: float = settings.MEMBER_HEARTBEAT_INTERVAL,
+        on_change: Optional[Callable] = None,
+        route_wakeups: bool = False,
+    ):
+        self.identity = identity
+        self.ttl = ttl
+        self.heartbeat_interval = min(heartbeat_interval, ttl / 3)
+        self.on_change = on_change
+        # Partitioned: every member dispatches, so wakeups go to all of them
+        self.route_wakeups = route_wakeups
+        self.members = ()
+        self._owners = {}
+        self._heartbeat_at = None
+        self._address = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def owns(self, worker_id: int) -> bool:
+        if self._heartbeat_at is None or time.monotonic() - self._heartbeat_at >= self.ttl:
+            return False
+        return self.owner_of(worker_id) == self.identity
+
+    def owner_of(self, worker_id: int) -> Optional[str]:
+        with self._lock:
+            owner = self._owners.get(worker_id)
+            if owner is None:
+                owner = self._owners[worker_id] = rendezvous_owner(self.members, worker_id)
+            return owner
+
+    def run_forever(self):
+        try:
+            self._address = cluster_bus.listen(settings.CONTROLLER_WAKEUP_HOST, settings.CONTROLLER_WAKEUP_PORT)
+        except OSError as e:
+            logger.error(f"Cannot listen for cluster messages: {e}")
+
+        while not self._stopping.is_set():
+            try:
+                self.heartbeat_once()
+            except Exception as e:
+                logger.error(f"Controller membership heartbeat failed: {e}")
+            self._stopping.wait(self.heartbeat_interval)
+
+    def heartbeat_once(self):
+        db = SessionLocal()
+        try:
+            rows = crud.heartbeat_controller_member(db, self.identity, self.ttl, self._address)
+        finally:
+            db.close()
+        self._heartbeat_at = time.monotonic()
+
+        peers = [r.address for r in rows if r.address and r.member_id != self.identity]
+        cluster_bus.set_peers(peers)
+        if self.route_wakeups:
+            dispatch_wakeup.set_remotes(peers)
+        members = tuple(r.member_id for r in rows)
+        if members == self.members:
+            return
+        with self._lock:
+            self.members = members
+            self._owners.clear()
+        print(f"Controller members changed: {len(members)} live")
+        if self.on_change:
+            self.on_change()
+
+    def stop(self):
+        self._stopping.set()
+        db = SessionLocal()
+        try:
+            crud.remove_controller_member(db, self.identity)
+        except Exception as e:
+            logger.error(f"Failed to leave controller membership: {e}")
+        finally:
+            db.close()
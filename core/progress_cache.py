@@ -0,0 +1,107 @@
+# controller/core/progress_cache.py
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Optional
+import threading
+import time
+
+from config.settings import settings
+
+
+@dataclass
+class ProgressEntry:
+    progress: int
+    duration: Optional[int]
+    requester_ip: Optional[str]
+    updated_at: datetime
+    persisted_progress: Optional[int] = None
+    persisted_duration: Optional[int] = None
+    persisted_at: float = 0.0
+
+    @property
+    def dirty(self) -> bool:
+        return self.progress != self.persisted_progress or self.duration != self.persisted_duration
+
+
+class ProgressTracker:
+    """
+    Latest reported progress per job, kept in memory so workers can report
+    as often as they like. report() says whether the new value is worth
+    writing to `jobs`: the first report for a job, 0 and 100, a move of at
+    least `step` percent, a new duration, or any report at all once
+    `interval` seconds have passed since the last write (which also renews
+    the job's lease, so it must stay below JOB_LEASE_SECONDS).
+    """
+
+    def __init__(
+        self,
+        step: int = settings.PROGRESS_PERSIST_STEP,
+        interval: float = settings.PROGRESS_PERSIST_INTERVAL,
+        max_entries: int = 100000,
+    ):
+        self.step = step
+        self.interval = interval
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def report(self, job_id: str, progress: int, duration: Optional[int] = None, requester_ip: Optional[str] = None) -> bool:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None:
+                entry = ProgressEntry(progress, duration, requester_ip, datetime.now(timezone.utc))
+                self._entries[job_id] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return True
+
+            self._entries.move_to_end(job_id)
+            entry.progress = progress
+            if duration is not None:
+                entry.duration = duration
+            entry.requester_ip = requester_ip
+            entry.updated_at = datetime.now(timezone.utc)
+
+            if not entry.dirty:
+                # Unchanged progress is still written now and then: the write renews the job's lease
+                return time.monotonic() - entry.persisted_at >= self.interval
+            if entry.persisted_progress is None or progress in (0, 100):
+                return True
+            if abs(progress - entry.persisted_progress) >= self.step:
+                return True
+            if entry.duration != entry.persisted_duration:
+                return True
+            return time.monotonic() - entry.persisted_at >= self.interval
+
+    def mark_persisted(self, job_id: str, progress: int, duration: Optional[int] = None):
+        # Records what was actually written (duration None = unchanged): a report that arrived
+        # while the write was in flight stays dirty and is folded into the next one
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry:
+                entry.persisted_progress = progress
+                if duration is not None:
+                    entry.persisted_duration = duration
+                entry.persisted_at = time.monotonic()
+
+    def duration_to_persist(self, job_id: str) -> Optional[int]:
+        # The reported duration when it differs from the last one written, else None
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.duration == entry.persisted_duration:
+                return None
+            return entry.duration
+
+    def get(self, job_id: str) -> Optional[ProgressEntry]:
+        # A snapshot: later reports do not change it while the caller writes it out
+        with self._lock:
+            entry = self._entries.get(job_id)
+            return replace(entry) if entry else None
+
+    def forget(self, job_id: str):
+        with self._lock:
+            self._entries.pop(job_id, None)
+
+
+progress_tracker = ProgressTracker()
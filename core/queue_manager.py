@@ -5,12 +5,8 @@ from db import crud
 def fetch_job():
     db = SessionLocal()
     try:
-        job = crud.get_next_job(db)
-        if not job:
-            return None
-
-        # Lock job
-        job = crud.update_job_status(db, job.job_id, "processing", 5)
-        return job
+        # Claim and mark in one transaction so concurrent callers never share a job
+        jobs = crud.claim_jobs(db, limit=1, status="processing", progress=5)
+        return jobs[0] if jobs else None
     finally:
         db.close()
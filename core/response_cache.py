@@ -0,0 +1,188 @@
+# controller/core/response_cache.py
+from collections import OrderedDict, defaultdict
+from typing import Callable, Hashable, Iterable, Optional
+import threading
+import time
+
+from config.settings import settings
+from core.job_events import job_events
+
+
+class ResponseCache:
+    """
+    Small in-process TTL + LRU cache for read endpoints. Each entry carries
+    tags (e.g. "job:<job_id>", "dashboard:admin") so writers can drop every
+    entry that depends on something that changed, without knowing the keys.
+
+    get_or_load() lets only one caller rebuild a missing key at a time;
+    concurrent callers for the same key wait for that result instead of
+    all hitting the database.
+    """
+
+    def __init__(self, ttl: float = settings.RESPONSE_CACHE_TTL, max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = defaultdict(set)
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, key: Hashable):
+        with self._lock:
+            return self._lookup(key)
+
+    def set(self, key: Hashable, value, tags: Iterable[str] = ()):
+        with self._lock:
+            self._store(key, value, tags)
+
+    def get_or_load(self, key: Hashable, loader: Callable, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                loading = self._loading.get(key)
+                if loading is None:
+                    self._stats["misses"] += 1
+                    loading = self._loading[key] = (threading.Event(), tags)
+                    break
+            # Someone else is loading this key; wait, then re-check the cache
+            loading[0].wait(self.ttl or 1)
+
+        try:
+            value = loader()
+            with self._lock:
+                # An invalidation that ran while loading wins: don't store a possibly stale value
+                if self._loading.get(key) is loading:
+                    self._store(key, value, tags)
+            return value
+        finally:
+            with self._lock:
+                if self._loading.get(key) is loading:
+                    del self._loading[key]
+            loading[0].set()
+
+    async def aget_or_load(self, key: Hashable, loader: Callable, tags: Iterable[str] = ()):
+        """
+        get_or_load() for `async def` handlers, with an awaitable loader.
+        Waiting for another caller's load would block the event loop, so
+        concurrent misses each load; an invalidation during the load still
+        keeps the result out of the cache.
+        """
+        tags = tuple(tags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            loading = None
+            if key not in self._loading:
+                loading = self._loading[key] = (threading.Event(), tags)
+
+        try:
+            value = await loader()
+            with self._lock:
+                if loading is not None and self._loading.get(key) is loading:
+                    self._store(key, value, tags)
+            return value
+        finally:
+            if loading is not None:
+                with self._lock:
+                    if self._loading.get(key) is loading:
+                        del self._loading[key]
+                loading[0].set()
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.pop(tag, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+            # Loads still in flight may have read the old rows; let them finish without storing
+            for key, (event, load_tags) in list(self._loading.items()):
+                if set(load_tags) & set(tags):
+                    del self._loading[key]
+                    event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[1]
+
+    def _store(self, key, value, tags):
+        if self.ttl <= 0:
+            return
+        self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tags[tag].add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def dashboard_tag(client_id: Optional[str]) -> str:
+    return "dashboard:admin" if client_id is None else f"dashboard:client:{client_id}"
+
+
+def job_tag(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def invalidate_job(job_id: str, client_id: Optional[str] = None):
+    # A job changed state: its detail view, its owner's dashboard and the admin dashboard are stale
+    tags = [job_tag(job_id), dashboard_tag(None)]
+    if client_id:
+        tags.append(dashboard_tag(client_id))
+    response_cache.invalidate(*tags)
+
+
+def _on_job_event(job_id: str, event_type: str, client_id: Optional[str], fields: dict):
+    # Progress ticks are overlaid from the progress tracker at read time, so only status changes invalidate
+    if event_type == "status":
+        invalidate_job(job_id, client_id)
+
+
+response_cache = ResponseCache()
+job_events.add_listener(_on_job_event)
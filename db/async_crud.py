@@ -0,0 +1,136 @@
+# controller/db/async_crud.py
+# asyncio versions of the crud functions on the hot request paths (job create,
+# job get, worker progress and status reports) for `async def` routes on
+# db.async_session.get_async_db. They keep the bookkeeping of db/crud.py;
+# rollup and slot updates are shared with it through AsyncSession.run_sync,
+# which runs them on the same async connection and transaction.
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from db import crud, models, rollups
+from db.crud import _job_values, lease_deadline, RUNNING_STATUSES
+from core.dispatch_signal import dispatch_wakeup
+from core.job_events import job_events
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+async def client_is_active(db: AsyncSession, client_id: str) -> bool:
+    result = await db.execute(
+        select(models.Client.id).where(models.Client.client_id == client_id, models.Client.is_active == True).limit(1)
+    )
+    return result.first() is not None
+
+
+async def job_owner(db: AsyncSession, job_id: str) -> Optional[str]:
+    # client_id for job events: from the broker's owner cache, else one indexed read
+    client_id = job_events.cached_owner(job_id)
+    if client_id:
+        return client_id
+    result = await db.execute(select(models.Job.client_id).where(models.Job.job_id == job_id).limit(1))
+    row = result.first()
+    if row is None:
+        return None
+    job_events.remember_owner(job_id, row.client_id)
+    return row.client_id
+
+
+async def job_exists_for_content(db: AsyncSession, client_id: str, content_id: str) -> bool:
+    result = await db.execute(
+        select(models.Job.id).where(models.Job.client_id == client_id, models.Job.content_id == content_id).limit(1)
+    )
+    return result.first() is not None
+
+
+async def create_job_with_tracks(db: AsyncSession, job_id: str, job_data: dict, audio_tracks: list, subtitle_tracks: list):
+    db_job = models.Job(**_job_values(job_id, job_data))
+    db_job.audio_tracks = [
+        models.JobAudioTrack(language=audio.language, file_path=audio.file_path) for audio in audio_tracks
+    ]
+    db_job.subtitle_tracks = [
+        models.JobSubtitleTrack(language=subtitle.language, file_path=subtitle.file_path) for subtitle in subtitle_tracks
+    ]
+    db.add(db_job)
+    await db.flush()
+    await db.run_sync(rollups.record_jobs, models.Job.id == db_job.id)
+    await db.commit()
+    dispatch_wakeup.notify()
+    job_events.publish(db_job.job_id, "status", client_id=db_job.client_id, status="queued", progress=0)
+    return db_job
+
+
+async def get_job_detail(db: AsyncSession, job_id: str):
+    # Tracks are loaded up front: lazy loads are not possible on an AsyncSession
+    result = await db.execute(
+        select(models.Job)
+        .where(models.Job.job_id == job_id)
+        .options(selectinload(models.Job.audio_tracks), selectinload(models.Job.subtitle_tracks))
+    )
+    return result.scalar_one_or_none()
+
+
+async def persist_job_progress(db: AsyncSession, job_id: str, progress: int, duration: Optional[int] = None, requester_ip: Optional[str] = None) -> bool:
+    """Async crud.persist_job_progress: one UPDATE per tick; a `duration` (pass it only when it changed) adds a locking read."""
+    target = crud.progress_target(job_id)
+    duration_changed = False
+    if duration is not None:
+        duration_changed = (await db.execute(crud.duration_changed_query(target, duration))).first() is not None
+    if duration_changed:
+        await db.run_sync(rollups.record_jobs, target, -1)
+
+    result = await db.execute(crud.progress_update(target, progress, requester_ip, duration if duration_changed else None))
+    if duration_changed:
+        await db.run_sync(rollups.record_jobs, target)
+    await db.commit()
+    if result.rowcount:
+        return True
+    exists = await db.execute(select(models.Job.id).where(models.Job.job_id == job_id).limit(1))
+    return exists.first() is not None
+
+
+async def release_job_slot(db: AsyncSession, job_pk: int, worker_id: Optional[int]) -> bool:
+    # Async crud.release_job_slot; caller commits
+    if worker_id is None:
+        return False
+    if (await db.execute(crud.release_job_slot_statement(job_pk, worker_id))).rowcount != 1:
+        return False
+    await db.run_sync(crud.release_worker_slots, worker_id, 1)
+    return True
+
+
+async def apply_status_report(db: AsyncSession, job_id: str, status: str, latest=None, **info):
+    """
+    A worker's status report: moves the job (and its rollups) to `status`,
+    folds in unpersisted progress from `latest`, renews the lease while the
+    job runs and releases its worker slot once it finishes. `info` holds
+    requester_ip, machine, os and arch. Commits and returns
+    (job, worker_id, slot_released), or None when the job does not exist.
+    """
+    result = await db.execute(select(models.Job).where(models.Job.job_id == job_id))
+    job = result.scalar_one_or_none()
+    if job is None:
+        return None
+
+    await db.run_sync(rollups.record_jobs, models.Job.id == job.id, -1)
+    job.status = status
+    job.updated_at = datetime.now(timezone.utc)
+    if status in RUNNING_STATUSES:
+        job.lease_expires_at = lease_deadline()
+    if latest and latest.dirty:
+        job.progress = latest.progress
+        if latest.duration is not None:
+            job.content_duration = latest.duration
+    for key, value in info.items():
+        setattr(job, key, value)
+    await db.flush()
+    await db.run_sync(rollups.record_jobs, models.Job.id == job.id)
+
+    worker_id = job.worker_id
+    finished = job.progress == 100 or status in TERMINAL_STATUSES
+    slot_released = finished and await release_job_slot(db, job.id, worker_id)
+    await db.commit()
+    return job, worker_id, slot_released
@@ -0,0 +1,52 @@
+# controller/db/async_session.py
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from config.settings import settings
+
+# asyncio driver used for each backend the sync engine may point at
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    # Same database as the sync engine (db/session.py), reached through an asyncio driver
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if drivername is None:
+        raise ValueError(f"No asyncio driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    # Created on first use, so scripts on the sync path (setup_tool.py) never need the async driver
+    global _engine, _sessionmaker
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+            pool_pre_ping=True,
+            pool_size=settings.ASYNC_DB_POOL_SIZE,
+            max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+        )
+        _sessionmaker = async_sessionmaker(_engine, autoflush=False, expire_on_commit=False)
+    return _engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _sessionmaker()
+
+
+# FastAPI dependency for `async def` routes; the sync get_db stays for everything else
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
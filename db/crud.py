@@ -1,10 +1,14 @@
 # controller/db/crud.py
 from sqlalchemy.orm import Session
-from db import models
-from sqlalchemy import func
-from datetime import datetime
+from db import models, rollups
+from sqlalchemy import func, update, insert, select, tuple_, and_, or_, case
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 from api.schemas import S3CredentialCreate, S3CredentialUpdate
+from core.dispatch_signal import dispatch_wakeup
+from core.job_events import job_events
+from config.settings import settings
 
 from typing import Optional
 
@@ -66,14 +70,15 @@ def update_s3_credential(
 def create_job(db: Session, job_id: str, job_data):
     db_job = models.Job(job_id=job_id, **job_data.dict())
     db.add(db_job)
+    db.flush()
+    rollups.record_jobs(db, models.Job.id == db_job.id)
     db.commit()
     db.refresh(db_job)
     return db_job
 
 
-def create_job_with_tracks(db: Session, job_id: str, job_data: dict, audio_tracks: list, subtitle_tracks: list):
-    # Create main job instance with all fields
-    db_job = models.Job(
+def _job_values(job_id: str, job_data: dict) -> dict:
+    return dict(
         job_id=job_id,
         content_id=job_data['content_id'],
         client_id=job_data.get('client_id'),
@@ -89,6 +94,11 @@ def create_job_with_tracks(db: Session, job_id: str, job_data: dict, audio_track
         progress=0,
     )
 
+
+def create_job_with_tracks(db: Session, job_id: str, job_data: dict, audio_tracks: list, subtitle_tracks: list):
+    # Create main job instance with all fields
+    db_job = models.Job(**_job_values(job_id, job_data))
+
     # Append audio tracks
     for audio in audio_tracks:
         db_audio = models.JobAudioTrack(
@@ -106,23 +116,543 @@ def create_job_with_tracks(db: Session, job_id: str, job_data: dict, audio_track
         db_job.subtitle_tracks.append(db_subtitle)
 
     db.add(db_job)
+    db.flush()
+    rollups.record_jobs(db, models.Job.id == db_job.id)
     db.commit()
     db.refresh(db_job)
+    dispatch_wakeup.notify()
+    job_events.publish(db_job.job_id, "status", client_id=db_job.client_id, status="queued", progress=0)
     return db_job
 
+
+def find_existing_jobs(db: Session, keys: list) -> set:
+    # Set-based duplicate check: returns the (client_id, content_id) pairs that already have a job
+    if not keys:
+        return set()
+    rows = db.query(models.Job.client_id, models.Job.content_id)\
+        .filter(tuple_(models.Job.client_id, models.Job.content_id).in_(keys))\
+        .all()
+    return {(client_id, content_id) for client_id, content_id in rows}
+
+
+def create_jobs_bulk(db: Session, entries: list):
+    """
+    Inserts many jobs and their tracks with executemany INSERTs in one transaction.
+    Each entry is a (job_id, job_data, audio_tracks, subtitle_tracks) tuple.
+    """
+    if not entries:
+        return
+    job_rows, audio_rows, subtitle_rows = [], [], []
+    for job_id, job_data, audio_tracks, subtitle_tracks in entries:
+        job_rows.append(_job_values(job_id, job_data))
+        audio_rows.extend({"job_id": job_id, "language": a.language, "file_path": a.file_path} for a in audio_tracks)
+        subtitle_rows.extend({"job_id": job_id, "language": t.language, "file_path": t.file_path} for t in subtitle_tracks)
+
+    try:
+        db.execute(insert(models.Job), job_rows)
+        if audio_rows:
+            db.execute(insert(models.JobAudioTrack), audio_rows)
+        if subtitle_rows:
+            db.execute(insert(models.JobSubtitleTrack), subtitle_rows)
+        rollups.record_jobs(db, models.Job.job_id.in_([row["job_id"] for row in job_rows]))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    dispatch_wakeup.notify()
+    for row in job_rows:
+        job_events.publish(row["job_id"], "status", client_id=row["client_id"], status="queued", progress=0)
+
+# Jobs held by a worker (or about to be); these carry a lease
+RUNNING_STATUSES = ("dispatched", "processing")
+
+
 def get_next_job(db: Session):
     return db.query(models.Job).filter(models.Job.status == "queued").order_by(models.Job.created_at.asc()).first()
 
+
+def _supports_skip_locked(db: Session) -> bool:
+    # server_version_info is only populated once a connection exists
+    dialect = db.connection().dialect
+    version = dialect.server_version_info or ()
+    if dialect.name == "postgresql":
+        return version >= (9, 5)
+    if dialect.name == "mysql":
+        if getattr(dialect, "is_mariadb", False):
+            return version >= (10, 6)
+        return version >= (8, 0, 1)
+    return False
+
+
+def claim_jobs(
+    db: Session,
+    limit: int = 1,
+    status: str = "dispatched",
+    progress: int = 0,
+    job_ids: Optional[list] = None
+):
+    """
+    Atomically moves up to `limit` queued jobs to `status` and returns them,
+    oldest first. Safe to call from several controllers at once: rows are
+    locked with SELECT ... FOR UPDATE SKIP LOCKED where the backend supports
+    it, otherwise each candidate is taken with a compare-and-set UPDATE.
+    """
+    if limit <= 0:
+        return []
+
+    candidates = db.query(models.Job.id).filter(models.Job.status == "queued")
+    if job_ids is not None:
+        if not job_ids:
+            return []
+        candidates = candidates.filter(models.Job.job_id.in_(job_ids))
+    candidates = candidates.order_by(models.Job.created_at.asc(), models.Job.id.asc()).limit(limit)
+
+    # Every claim starts a lease; the holder must heartbeat before it lapses
+    values = {
+        "status": status,
+        "progress": progress,
+        "updated_at": datetime.now(timezone.utc),
+        "lease_expires_at": lease_deadline(),
+        "attempts": func.coalesce(models.Job.attempts, 0) + 1,
+    }
+    try:
+        if _supports_skip_locked(db):
+            claimed_ids = [row.id for row in candidates.with_for_update(skip_locked=True).all()]
+            if claimed_ids:
+                claimed = models.Job.id.in_(claimed_ids)
+                rollups.record_jobs(db, claimed, -1)
+                db.execute(
+                    update(models.Job)
+                    .where(claimed)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                rollups.record_jobs(db, claimed)
+        else:
+            claimed_ids = []
+            for (job_pk,) in candidates.all():
+                result = db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == job_pk, models.Job.status == "queued")
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    claimed_ids.append(job_pk)
+            if claimed_ids:
+                # Rows are already updated here, so the old status is passed explicitly
+                claimed = models.Job.id.in_(claimed_ids)
+                rollups.record_jobs(db, claimed, -1, status="queued")
+                rollups.record_jobs(db, claimed)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if not claimed_ids:
+        return []
+    return db.query(models.Job)\
+        .filter(models.Job.id.in_(claimed_ids))\
+        .order_by(models.Job.created_at.asc(), models.Job.id.asc())\
+        .populate_existing()\
+        .all()
+
+
+def lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+
+def renew_leases(db: Session, job_ids: list, worker_id: Optional[int] = None) -> set:
+    """
+    Heartbeat: pushes the lease of the given running jobs forward with one
+    UPDATE and commits. Returns the job ids that are no longer leased to the
+    caller (finished, reaped or unknown), so the worker can stop them.
+    """
+    if not job_ids:
+        return set()
+    running = [
+        models.Job.job_id.in_(job_ids),
+        models.Job.status.in_(RUNNING_STATUSES),
+    ]
+    if worker_id is not None:
+        running.append(or_(models.Job.worker_id == worker_id, models.Job.worker_id.is_(None)))
+
+    result = db.execute(
+        update(models.Job)
+        .where(*running)
+        .values(lease_expires_at=lease_deadline())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount == len(set(job_ids)):
+        return set()
+    leased = {row.job_id for row in db.query(models.Job.job_id).filter(*running).all()}
+    return set(job_ids) - leased
+
+
+def transition_worker_state(db: Session, worker_id: int, from_state: Optional[str], values: dict) -> bool:
+    """
+    Moves a worker out of `from_state` with a single guarded UPDATE, so a
+    transition decided on a stale read (the autoscaler and reconciler run on
+    separate threads and sessions) cannot overwrite one made in between.
+    Returns False when the worker has already left `from_state`. Caller commits.
+    """
+    worker = models.WorkerInstance
+    current = worker.state.is_(None) if from_state is None else worker.state == from_state
+    result = db.execute(
+        update(worker)
+        .where(worker.id == worker_id, current)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def reserve_worker_slot(db: Session, worker_id: int, job_pk: int) -> bool:
+    """
+    Takes one of the worker's slots with a single guarded UPDATE, so
+    concurrent dispatchers can never push current_jobs past max_jobs, and
+    records the worker on the job so the slot can be released exactly.
+    Returns False when the worker is already full. Caller commits.
+    """
+    worker = models.WorkerInstance
+    current = func.coalesce(worker.current_jobs, 0)
+    result = db.execute(
+        update(worker)
+        .where(worker.id == worker_id, current < worker.max_jobs)
+        .values(current_jobs=current + 1, last_used=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_pk)
+        .values(worker_id=worker_id, slot_held=True)
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+def release_job_slot(db: Session, job_pk: int, worker_id: Optional[int]) -> bool:
+    """
+    Gives back the slot a job holds on `worker_id`. Idempotent: only the
+    first call for a held slot decrements the worker, repeated or late
+    terminal reports do nothing. Returns True if a slot was released.
+    Caller commits.
+    """
+    if worker_id is None:
+        return False
+    if db.execute(release_job_slot_statement(job_pk, worker_id)).rowcount != 1:
+        return False
+    release_worker_slots(db, worker_id, 1)
+    return True
+
+
+def release_job_slot_statement(job_pk: int, worker_id: int):
+    # Shared with db/async_crud.py: clears slot_held only if this worker still holds it
+    return (
+        update(models.Job)
+        .where(models.Job.id == job_pk, models.Job.worker_id == worker_id, models.Job.slot_held == True)
+        .values(slot_held=False)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release_worker_slots(db: Session, worker_id: int, count: int):
+    # Relative decrement that never goes below zero; caller commits
+    current = models.WorkerInstance.current_jobs
+    db.execute(
+        update(models.WorkerInstance)
+        .where(models.WorkerInstance.id == worker_id)
+        .values(current_jobs=case((current > count, current - count), else_=0), last_active=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def forget_worker_slots(db: Session, worker_ids: list):
+    # The workers went away and their counters were reset; their jobs no longer hold slots. Caller commits
+    if worker_ids:
+        db.execute(
+            update(models.Job)
+            .where(models.Job.worker_id.in_(worker_ids), models.Job.slot_held == True)
+            .values(slot_held=False)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def reap_expired_leases(db: Session, limit: int = 500, max_attempts: int = settings.JOB_MAX_ATTEMPTS) -> list:
+    """
+    Takes running jobs whose lease has lapsed (oldest first, via the
+    (status, lease_expires_at) index) back from their worker: requeued, or
+    failed once they used up `max_attempts`. Frees the worker slots they held
+    and commits. Returns the reaped rows as (job_id, client_id, worker_id, status).
+    """
+    expired = db.query(
+        models.Job.id, models.Job.job_id, models.Job.client_id, models.Job.worker_id,
+        models.Job.attempts, models.Job.slot_held
+    ).filter(
+        models.Job.status.in_(RUNNING_STATUSES),
+        models.Job.lease_expires_at < datetime.utcnow(),
+    ).order_by(models.Job.lease_expires_at.asc()).limit(limit)
+    # Locked so a heartbeat cannot renew a lease between this read and the update below
+    rows = expired.with_for_update(skip_locked=_supports_skip_locked(db)).all()
+    if not rows:
+        db.commit()
+        return []
+
+    now = datetime.now(timezone.utc)
+    reaped, updates, slots = [], [], defaultdict(int)
+    for row in rows:
+        exhausted = (row.attempts or 0) >= max_attempts
+        status = "failed" if exhausted else "queued"
+        updates.append({
+            "id": row.id,
+            "status": status,
+            "progress": 0,
+            "worker_id": None,
+            "slot_held": False,
+            "lease_expires_at": None,
+            "error": f"Lease expired after {row.attempts} attempt(s)" if exhausted else None,
+            "updated_at": now,
+        })
+        if row.worker_id and row.slot_held:
+            slots[row.worker_id] += 1
+        reaped.append((row.job_id, row.client_id, row.worker_id, status))
+
+    try:
+        reaped_pks = models.Job.id.in_([row.id for row in rows])
+        rollups.record_jobs(db, reaped_pks, -1)
+        db.execute(update(models.Job), updates)
+        rollups.record_jobs(db, reaped_pks)
+        for worker_id, count in slots.items():
+            release_worker_slots(db, worker_id, count)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return reaped
+
+
+def adopt_unleased_jobs(db: Session) -> int:
+    # Running jobs from before leases existed get one lease period to heartbeat
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.status.in_(RUNNING_STATUSES), models.Job.lease_expires_at.is_(None))
+        .values(lease_expires_at=lease_deadline())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def acquire_controller_lease(db: Session, name: str, holder: str, ttl: int, address: Optional[str] = None) -> Optional[int]:
+    """
+    Takes or renews the `name` lease for `holder` with one conditional
+    UPDATE (free, expired or already ours) and commits. Returns the
+    leadership term while the lease is held, None when someone else holds it.
+    """
+    lease = models.ControllerLease
+    if db.query(lease.name).filter(lease.name == name).first() is None:
+        try:
+            db.add(lease(name=name, term=0))
+            db.commit()
+        except IntegrityError:
+            # Another process created it first
+            db.rollback()
+
+    now = datetime.utcnow()
+    result = db.execute(
+        update(lease)
+        .where(lease.name == name, or_(lease.holder == holder, lease.expires_at.is_(None), lease.expires_at < now))
+        # term first: MySQL applies SET clauses left to right and must compare the old holder
+        .ordered_values(
+            (lease.term, case((lease.holder == holder, lease.term), else_=lease.term + 1)),
+            (lease.holder, holder),
+            (lease.address, address),
+            (lease.expires_at, now + timedelta(seconds=ttl)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        return None
+    return db.query(lease.term).filter(lease.name == name).scalar()
+
+
+def get_controller_lease(db: Session, name: str):
+    return db.query(models.ControllerLease).filter(models.ControllerLease.name == name).first()
+
+
+def release_controller_lease(db: Session, name: str, holder: str):
+    # Expire our lease right away so another process can take over without waiting out the TTL
+    lease = models.ControllerLease
+    db.execute(
+        update(lease)
+        .where(lease.name == name, lease.holder == holder)
+        .values(expires_at=None, address=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def heartbeat_controller_member(db: Session, member_id: str, ttl: int, address: Optional[str] = None) -> list:
+    """
+    Joins or renews `member_id` in controller_members, forgets members that
+    have been gone for a while, commits and returns the live members as
+    (member_id, address) rows ordered by id.
+    """
+    member = models.ControllerMember
+    now = datetime.utcnow()
+    values = {"address": address, "expires_at": now + timedelta(seconds=ttl)}
+    renewed = db.execute(
+        update(member).where(member.member_id == member_id).values(**values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not renewed:
+        try:
+            db.add(member(member_id=member_id, joined_at=now, **values))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    db.query(member).filter(member.expires_at < now - timedelta(seconds=ttl * 10)).delete(synchronize_session=False)
+    db.commit()
+    return db.query(member.member_id, member.address).filter(member.expires_at > now)\
+        .order_by(member.member_id.asc()).all()
+
+
+def remove_controller_member(db: Session, member_id: str):
+    # Leaving on shutdown rebalances the partitions right away instead of after the TTL
+    db.query(models.ControllerMember).filter(models.ControllerMember.member_id == member_id)\
+        .delete(synchronize_session=False)
+    db.commit()
+
+
+def release_jobs(db: Session, job_ids: list, from_status: str = "dispatched"):
+    # Hand claimed-but-unsent jobs back to the queue
+    if not job_ids:
+        return 0
+    rows = (
+        db.query(models.Job.id, models.Job.worker_id, models.Job.slot_held)
+        .filter(models.Job.job_id.in_(job_ids), models.Job.status == from_status)
+        .with_for_update()
+        .all()
+    )
+    if not rows:
+        db.commit()
+        return 0
+    released_ids = [row.id for row in rows]
+    released = models.Job.id.in_(released_ids)
+    rollups.record_jobs(db, released, -1)
+    db.execute(
+        update(models.Job)
+        .where(released)
+        .values(
+            status="queued", progress=0, updated_at=datetime.now(timezone.utc), lease_expires_at=None,
+            worker_id=None, slot_held=False,
+            # Never sent to a worker, so the claim does not count as an attempt
+            attempts=case((models.Job.attempts > 0, models.Job.attempts - 1), else_=0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rollups.record_jobs(db, released)
+    slots = defaultdict(int)
+    for row in rows:
+        if row.worker_id and row.slot_held:
+            slots[row.worker_id] += 1
+    for worker_id, count in slots.items():
+        release_worker_slots(db, worker_id, count)
+    db.commit()
+    return len(released_ids)
+
 def update_job_status(db: Session, job_id: str, status: str, progress: int = 0, error: str = None):
     job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
     if job:
+        rollups.record_jobs(db, models.Job.id == job.id, -1)
         job.status = status
         job.progress = progress
         if error:
             job.error = error
+        db.flush()
+        rollups.record_jobs(db, models.Job.id == job.id)
         db.commit()
     return job
 
+def bulk_update_job_status(db: Session, updates: list):
+    """
+    Applies many status transitions in a single executemany UPDATE and commits.
+    Each item is a dict with the job primary key `id`, `status`, `progress`
+    and optional `error` and `worker_id`.
+    """
+    if updates:
+        now = datetime.now(timezone.utc)
+        updated = models.Job.id.in_([u["id"] for u in updates])
+        rollups.record_jobs(db, updated, -1)
+        db.execute(
+            update(models.Job),
+            [
+                {
+                    "id": u["id"],
+                    "status": u["status"],
+                    "progress": u["progress"],
+                    "error": u.get("error"),
+                    "updated_at": now,
+                    **({"worker_id": u["worker_id"]} if "worker_id" in u else {}),
+                }
+                for u in updates
+            ],
+        )
+        rollups.record_jobs(db, updated)
+    db.commit()
+
+def persist_job_progress(db: Session, job_id: str, progress: int, duration: Optional[int] = None, requester_ip: Optional[str] = None) -> bool:
+    """
+    Writes reported progress with a single UPDATE (no prior SELECT) and commits.
+    Pass `duration` only when it differs from the last persisted one (see
+    ProgressTracker.duration_to_persist): it costs an extra locking read for
+    the rollups. Finished jobs are left untouched so a late tick cannot
+    rewind them. Returns False when the job does not exist.
+    """
+    target = progress_target(job_id)
+    # A new duration moves summed duration in the rollups; plain progress ticks skip that
+    duration_changed = duration is not None and db.execute(duration_changed_query(target, duration)).first() is not None
+    if duration_changed:
+        rollups.record_jobs(db, target, -1)
+
+    result = db.execute(progress_update(target, progress, requester_ip, duration if duration_changed else None))
+    if duration_changed:
+        rollups.record_jobs(db, target)
+    db.commit()
+    if result.rowcount:
+        return True
+    # Rare path: tell "finished" apart from "unknown job"
+    return db.query(models.Job.id).filter(models.Job.job_id == job_id).first() is not None
+
+
+# Statements behind persist_job_progress, shared with db/async_crud.py
+
+def progress_target(job_id: str):
+    return and_(models.Job.job_id == job_id, models.Job.status.notin_(["completed", "failed"]))
+
+
+def duration_changed_query(target, duration: int):
+    return (
+        select(models.Job.id)
+        .where(target, or_(models.Job.content_duration.is_(None), models.Job.content_duration != duration))
+        .with_for_update()
+        .limit(1)
+    )
+
+
+def progress_update(target, progress: int, requester_ip: Optional[str] = None, duration: Optional[int] = None):
+    # A progress write is also a heartbeat for the job's lease
+    values = {"progress": progress, "updated_at": datetime.now(timezone.utc), "lease_expires_at": lease_deadline()}
+    if requester_ip:
+        values["requester_ip"] = requester_ip
+    if duration is not None:
+        values["content_duration"] = duration
+    return update(models.Job).where(target).values(**values).execution_options(synchronize_session=False)
+
 def get_pending_jobs(db: Session, limit: int = 2):
     return db.query(models.Job)\
         .filter(models.Job.status.in_(["queued"]))\
@@ -131,7 +661,7 @@ def get_pending_jobs(db: Session, limit: int = 2):
         .all()
 
 def count_running_jobs(db: Session):
-    return db.query(models.Job).filter(models.Job.status.in_(["processing", "dispatched"])).count()
+    return db.query(models.Job).filter(models.Job.status.in_(RUNNING_STATUSES)).count()
 
 def get_job_by_id(db: Session, job_id: str):
     return db.query(models.Job).filter(models.Job.job_id == job_id).first()
@@ -149,28 +679,32 @@ def get_dashboard_summary_data(
     Clients get data limited to their own jobs.
     Supports optional date filtering.
     """
-    query = db.query(models.Job)
-
-    if not auth["is_admin"]:
-        query = query.filter(models.Job.client_id == auth["client_id"])
-
-    if date_from:
-        query = query.filter(models.Job.created_at >= date_from)
-    if date_to:
-        query = query.filter(models.Job.created_at <= date_to)
-
-    jobs = query.all()
+    # Pre-aggregated rollups for whole hours/days, raw jobs only for partial edge hours
+    groups = rollups.grouped_totals(
+        db,
+        client_id=None if auth["is_admin"] else auth["client_id"],
+        date_from=date_from,
+        date_to=date_to,
+    )
 
-    total_jobs = len(jobs)
+    total_jobs = 0
     total_duration = 0
     jobs_by_status = defaultdict(int)
     duration_by_status = defaultdict(int)
-
-    for job in jobs:
-        jobs_by_status[job.status] += 1
-        if job.content_duration:
-            total_duration += job.content_duration
-            duration_by_status[job.status] += job.content_duration
+    by_client = defaultdict(lambda: [0, 0])
+    by_worker = defaultdict(lambda: [0, 0])
+
+    for client_id, worker, status, job_count, duration in groups:
+        total_jobs += job_count
+        total_duration += duration
+        jobs_by_status[status] += job_count
+        if duration:
+            duration_by_status[status] += duration
+        by_client[client_id][0] += job_count
+        by_client[client_id][1] += duration
+        if worker:
+            by_worker[worker][0] += job_count
+            by_worker[worker][1] += duration
 
     summary = {
         "total_jobs": total_jobs,
@@ -180,28 +714,8 @@ def get_dashboard_summary_data(
     }
 
     if auth["is_admin"]:
-        # Jobs grouped by client
-        client_summary = (
-            db.query(
-                models.Job.client_id,
-                func.count(models.Job.id),
-                func.coalesce(func.sum(models.Job.content_duration), 0)
-            )
-            .group_by(models.Job.client_id)
-            .all()
-        )
-
-        # Jobs grouped by worker (machine)
-        worker_summary = (
-            db.query(
-                models.Job.machine,
-                func.count(models.Job.id),
-                func.coalesce(func.sum(models.Job.content_duration), 0)
-            )
-            .filter(models.Job.machine.isnot(None))
-            .group_by(models.Job.machine)
-            .all()
-        )
+        client_summary = [(cid, count, duration) for cid, (count, duration) in by_client.items()]
+        worker_summary = [(machine, count, duration) for machine, (count, duration) in by_worker.items()]
 
         # All EC2 worker instances
         all_workers = db.query(models.WorkerInstance).all()
@@ -232,6 +746,7 @@ def get_dashboard_summary_data(
                     "current_jobs": w.current_jobs,
                     "max_jobs": w.max_jobs,
                     "is_active": w.is_active,
+                    "state": w.state,
                     "last_used": w.last_used,
                     "last_active": w.last_active
                 }
@@ -1,5 +1,5 @@
 # controller/db/models.py
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db.session import Base
@@ -43,6 +43,12 @@ class Job(Base):
     machine = Column(String(100), nullable=True)
     os = Column(String(100), nullable=True)
     arch = Column(String(100), nullable=True)
+    # Lease held by whoever runs the job; renewed by worker heartbeats, reaped when it lapses
+    worker_id = Column(Integer, ForeignKey("worker_instances.id"), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+    # True while the job occupies one of worker_id's current_jobs slots
+    slot_held = Column(Boolean, default=False)
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     created_at = Column(DateTime, server_default=func.now())
 
@@ -51,6 +57,35 @@ class Job(Base):
     audio_tracks = relationship("JobAudioTrack", back_populates="job", cascade="all, delete-orphan")
     subtitle_tracks = relationship("JobSubtitleTrack", back_populates="job", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves queue claims (status = 'queued' ORDER BY created_at) without locking unrelated rows
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        # Keyset pagination of /api/jobs on (created_at, id), globally and per client
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_client_created_at_id", "client_id", "created_at", "id"),
+        # Expired-lease scan: status IN (dispatched, processing) AND lease_expires_at < now
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+    )
+
+
+
+class JobStatsRollup(Base):
+    # Job counts and summed content_duration per (period, bucket, client, worker, status),
+    # kept in step with `jobs` by db/rollups.py so the dashboard never scans raw jobs
+    __tablename__ = "job_stats_rollups"
+
+    # Natural primary key: upserts never burn auto-increment values
+    period = Column(String(5), primary_key=True)  # "hour" or "day"
+    bucket = Column(DateTime, primary_key=True)  # start of the period, from jobs.created_at
+    client_id = Column(String(50), primary_key=True)
+    worker = Column(String(100), primary_key=True, default="")  # jobs.machine, "" when unassigned
+    status = Column(String(20), primary_key=True)
+    job_count = Column(Integer, nullable=False, default=0)
+    total_duration = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_job_stats_rollups_client", "period", "client_id", "bucket"),
+    )
 
 class JobLog(Base):
     __tablename__ = "job_logs"
@@ -80,6 +115,9 @@ class WorkerInstance(Base):
     current_jobs = Column(Integer, default=0)
     max_jobs = Column(Integer, default=3)
     is_active = Column(Boolean, default=False)
+    # Lifecycle: stopped -> starting -> booting -> healthy -> draining -> stopped
+    state = Column(String(20), default="stopped")
+    state_changed_at = Column(DateTime, default=datetime.utcnow)
     last_used = Column(DateTime, default=datetime.utcnow)
     last_active = Column(DateTime, default=datetime.utcnow)
 
@@ -128,3 +166,29 @@ class JobSubtitleTrack(Base):
     
 
     job = relationship("Job", back_populates="subtitle_tracks")
+
+
+class ControllerLease(Base):
+    # Leadership among controller processes: whoever holds an unexpired lease on `name`
+    # runs the background loops; renewed every few seconds, taken over once it lapses
+    __tablename__ = "controller_leases"
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(150), nullable=True)
+    # Where the holder listens for cross-process dispatch wakeups ("host:port")
+    address = Column(String(100), nullable=True)
+    # Incremented on every change of holder (fencing token / leadership term)
+    term = Column(Integer, default=0, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+
+
+class ControllerMember(Base):
+    # Live controller processes for partitioned dispatch (DISPATCH_MODE=partitioned); each
+    # heartbeats its row and owns the workers that rendezvous-hash to it among live members
+    __tablename__ = "controller_members"
+
+    member_id = Column(String(150), primary_key=True)
+    # Where the member listens for dispatch wakeups ("host:port")
+    address = Column(String(100), nullable=True)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
@@ -0,0 +1,184 @@
+# controller/db/rollups.py
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, literal, or_, select, true
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from db import models
+
+PERIODS = ("day", "hour")
+ROLLUP_KEY = ("period", "bucket", "client_id", "worker", "status")
+ROLLUP_COLUMNS = ROLLUP_KEY + ("job_count", "total_duration")
+
+
+def _bucket(dialect_name: str, period: str):
+    # Start of the hour/day containing jobs.created_at, computed by the database
+    column = models.Job.created_at
+    if dialect_name == "postgresql":
+        return func.date_trunc(period, column)
+    if dialect_name == "sqlite":
+        # SQLite keeps DateTime as text in SQLAlchemy's format, microseconds included
+        return func.strftime("%Y-%m-%d %H:00:00.000000" if period == "hour" else "%Y-%m-%d 00:00:00.000000", column)
+    return func.date_format(column, "%Y-%m-%d %H:00:00" if period == "hour" else "%Y-%m-%d 00:00:00")
+
+
+def _upsert(dialect_name: str, rows):
+    table = models.JobStatsRollup.__table__
+    if dialect_name == "mysql":
+        stmt = mysql.insert(table).from_select(ROLLUP_COLUMNS, rows)
+        return stmt.on_duplicate_key_update(
+            job_count=table.c.job_count + stmt.inserted.job_count,
+            total_duration=table.c.total_duration + stmt.inserted.total_duration,
+        )
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    stmt = dialect.insert(table).from_select(ROLLUP_COLUMNS, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "job_count": table.c.job_count + stmt.excluded.job_count,
+            "total_duration": table.c.total_duration + stmt.excluded.total_duration,
+        },
+    )
+
+
+def record_jobs(db: Session, condition, sign: int = 1, status: Optional[str] = None):
+    """
+    Adds (sign=1) or takes away (sign=-1) the jobs matching `condition` in
+    every rollup period, as one INSERT ... SELECT upsert per period that
+    runs in the caller's transaction.
+
+    A transition is recorded as record_jobs(..., -1) before the jobs
+    change and record_jobs(..., 1) after. When the old rows cannot be
+    read beforehand, pass the old `status` to the -1 call made afterwards.
+    """
+    dialect_name = db.get_bind().dialect.name
+    Job = models.Job
+    worker = func.coalesce(Job.machine, "")
+    status_column = literal(status) if status else Job.status
+    group_status = [] if status else [Job.status]
+
+    for period in PERIODS:
+        bucket = _bucket(dialect_name, period)
+        rows = (
+            select(
+                literal(period),
+                bucket,
+                Job.client_id,
+                worker,
+                status_column,
+                func.count(Job.id) * sign,
+                func.coalesce(func.sum(Job.content_duration), 0) * sign,
+            )
+            .where(condition, Job.created_at.isnot(None))
+            .group_by(bucket, Job.client_id, worker, *group_status)
+        )
+        db.execute(_upsert(dialect_name, rows))
+
+
+def rebuild(db: Session):
+    """Recomputes every rollup row from `jobs` in one transaction."""
+    db.execute(delete(models.JobStatsRollup))
+    record_jobs(db, true())
+    db.commit()
+
+
+def _floor(dt, period: str):
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0) if period == "day" else dt
+
+
+def _ceil(dt, period: str):
+    floor = _floor(dt, period)
+    if floor == dt:
+        return dt
+    return floor + (timedelta(days=1) if period == "day" else timedelta(hours=1))
+
+
+def plan_range(date_from=None, date_to=None) -> list:
+    """
+    Splits [date_from, date_to] into (source, start, end, end_inclusive)
+    segments: whole days from day rollups, whole hours at the edges from
+    hour rollups and the remaining partial hours from `jobs` ("raw").
+    """
+    segments = []
+
+    def cover(lo, hi, hi_inclusive, periods):
+        if not periods:
+            segments.append(("raw", lo, hi, hi_inclusive))
+            return
+        period, finer = periods[0], periods[1:]
+        start = None if lo is None else _ceil(lo, period)
+        end = None if hi is None else _floor(hi, period)
+        if start is not None and end is not None and start >= end:
+            cover(lo, hi, hi_inclusive, finer)
+            return
+        if lo is not None and lo < start:
+            cover(lo, start, False, finer)
+        segments.append((period, start, end, False))
+        if hi is not None and (end < hi or hi_inclusive):
+            cover(end, hi, hi_inclusive, finer)
+
+    cover(date_from, date_to, True, PERIODS)
+    return segments
+
+
+def _range_condition(column, start, end, end_inclusive):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column <= end if end_inclusive else column < end)
+    return and_(true(), *conditions)
+
+
+def grouped_totals(db: Session, client_id: Optional[str] = None, date_from=None, date_to=None) -> list:
+    """
+    Job count and summed duration per (client_id, worker, status) for jobs
+    created in [date_from, date_to], read from the rollups plus at most two
+    partial hours of raw jobs. Returns (client_id, worker, status, count, duration)
+    tuples; worker is "" for jobs that never reached a worker.
+    """
+    segments = plan_range(date_from, date_to)
+    rollup_segments = [s for s in segments if s[0] != "raw"]
+    raw_segments = [s for s in segments if s[0] == "raw"]
+    totals = {}
+
+    if rollup_segments:
+        Rollup = models.JobStatsRollup
+        query = db.query(
+            Rollup.client_id, Rollup.worker, Rollup.status,
+            func.sum(Rollup.job_count), func.sum(Rollup.total_duration)
+        ).filter(or_(*[
+            and_(Rollup.period == period, _range_condition(Rollup.bucket, start, end, inclusive))
+            for period, start, end, inclusive in rollup_segments
+        ]))
+        if client_id:
+            query = query.filter(Rollup.client_id == client_id)
+        for row in query.group_by(Rollup.client_id, Rollup.worker, Rollup.status).all():
+            _accumulate(totals, row)
+
+    if raw_segments:
+        Job = models.Job
+        worker = func.coalesce(Job.machine, "")
+        query = db.query(
+            Job.client_id, worker, Job.status,
+            func.count(Job.id), func.coalesce(func.sum(Job.content_duration), 0)
+        ).filter(or_(*[
+            _range_condition(Job.created_at, start, end, inclusive)
+            for _, start, end, inclusive in raw_segments
+        ]))
+        if client_id:
+            query = query.filter(Job.client_id == client_id)
+        for row in query.group_by(Job.client_id, worker, Job.status).all():
+            _accumulate(totals, row)
+
+    return [(*key, count, duration) for key, (count, duration) in totals.items() if count]
+
+
+def _accumulate(totals: dict, row):
+    key_client, key_worker, key_status, count, duration = row
+    key = (key_client, key_worker, key_status)
+    current = totals.get(key, (0, 0))
+    totals[key] = (current[0] + int(count or 0), current[1] + int(duration or 0))
@@ -0,0 +1,280 @@
+# controller/services/autoscaler.py
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import math
+import threading
+import time
+
+from sqlalchemy import func
+
+from db.session import SessionLocal
+from db import crud, models
+from config.settings import settings
+from core.loops import start_loop
+from services.job_cost import JobCostEstimator
+from services.worker_lifecycle import STOPPED, STARTING, BOOTING, HEALTHY, DRAINING, transition_state
+from services.worker_registry import worker_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScalingDecision:
+    at: datetime
+    action: str  # "scale_up", "scale_down" or "hold"
+    reason: str
+    queued_jobs: int
+    in_flight_jobs: int
+    queued_work_seconds: float
+    slots_per_worker: int
+    current_workers: int
+    desired_workers: int
+    workers: list = field(default_factory=list)
+
+
+class Autoscaler:
+    """
+    Decides how many workers should be up from queue depth, in-flight jobs
+    and estimated queued work, then asks the reconciler to start or drain
+    workers (it only sets `starting` / `draining`; EC2 calls happen there).
+
+    desired = max(workers needed for in-flight jobs,
+                  workers needed to finish queued work within target_drain_seconds),
+    at least one while anything is queued, clamped to [min_workers, max_workers].
+
+    Scaling up is immediate apart from a short cooldown, and draining workers
+    that still run jobs are reclaimed before stopped ones are booted.
+    Scaling down needs demand to stay below capacity for scale_down_delay,
+    only drains workers that have been idle for idle_timeout and up for at
+    least min_lifetime, and has its own (longer) cooldown.
+    """
+
+    def __init__(
+        self,
+        reconciler=None,
+        registry=worker_registry,
+        estimator: Optional[JobCostEstimator] = None,
+        interval: int = settings.AUTOSCALER_INTERVAL,
+        min_workers: int = settings.AUTOSCALER_MIN_WORKERS,
+        max_workers: int = settings.AUTOSCALER_MAX_WORKERS,
+        target_drain_seconds: float = settings.AUTOSCALER_TARGET_DRAIN_SECONDS,
+        max_step: int = settings.AUTOSCALER_MAX_STEP,
+        scale_up_cooldown: int = settings.AUTOSCALER_SCALE_UP_COOLDOWN,
+        scale_down_cooldown: int = settings.AUTOSCALER_SCALE_DOWN_COOLDOWN,
+        scale_down_delay: int = settings.AUTOSCALER_SCALE_DOWN_DELAY,
+        min_lifetime: int = settings.AUTOSCALER_MIN_LIFETIME,
+        idle_timeout: int = settings.WORKER_IDLE_TIMEOUT,
+        history_size: int = 200,
+        partition=None,
+    ):
+        self.reconciler = reconciler
+        self.registry = registry
+        self.estimator = estimator or JobCostEstimator()
+        self.interval = interval
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_drain_seconds = target_drain_seconds
+        self.max_step = max(1, max_step)
+        self.scale_up_cooldown = scale_up_cooldown
+        self.scale_down_cooldown = scale_down_cooldown
+        self.scale_down_delay = scale_down_delay
+        self.min_lifetime = timedelta(seconds=min_lifetime)
+        self.idle_timeout = timedelta(seconds=idle_timeout)
+        # Partitioned dispatch: scale only owned workers, for this partition's share of the demand
+        self.partition = partition
+
+        self.decisions = deque(maxlen=history_size)
+        self._last_scale_up = None
+        self._last_scale_down = None
+        self._below_since = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        # Dispatcher found no free worker: evaluate now instead of at the next tick
+        self._wakeup.set()
+
+    def start(self):
+        self._stopping = start_loop(self.run_forever)
+
+    def run_forever(self, stopping: threading.Event):
+        # Hysteresis timers restart with each leadership term
+        self._below_since = None
+        while not stopping.is_set():
+            try:
+                self.evaluate_once()
+            except Exception as e:
+                logger.error(f"Autoscaler pass failed: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def recent_decisions(self, limit: int = 50) -> list:
+        return [asdict(d) for d in list(self.decisions)[-limit:]]
+
+    def evaluate_once(self) -> ScalingDecision:
+        db = SessionLocal()
+        try:
+            workers = db.query(models.WorkerInstance).all()
+            queued_jobs, queued_work = self._queued_work(db)
+            in_flight = crud.count_running_jobs(db)
+            if self.partition is not None:
+                fleet_size = len(workers)
+                workers = [w for w in workers if self.partition.owns(w.id)]
+                # Every controller claims from the shared queue, so each partition
+                # provisions for a share of the backlog proportional to its size
+                share = len(workers) / fleet_size if fleet_size else 0
+                queued_jobs = math.ceil(queued_jobs * share)
+                queued_work *= share
+                in_flight = sum(w.current_jobs or 0 for w in workers)
+
+            slots_per_worker = self._slots_per_worker(workers)
+            active = [w for w in workers if w.state in (STARTING, BOOTING, HEALTHY)]
+            # Jobs finishing on draining workers don't need new capacity
+            draining_jobs = sum(w.current_jobs or 0 for w in workers if w.state == DRAINING)
+            desired = self._desired_workers(
+                queued_jobs, queued_work, max(0, in_flight - draining_jobs), slots_per_worker, len(workers)
+            )
+
+            decision = ScalingDecision(
+                at=datetime.utcnow(),
+                action="hold",
+                reason="capacity matches demand",
+                queued_jobs=queued_jobs,
+                in_flight_jobs=in_flight,
+                queued_work_seconds=round(queued_work, 1),
+                slots_per_worker=slots_per_worker,
+                current_workers=len(active),
+                desired_workers=desired,
+            )
+
+            if desired > len(active):
+                self._below_since = None
+                self._scale_up(db, workers, desired - len(active), decision)
+            elif desired < len(active):
+                self._scale_down(db, active, len(active) - desired, decision)
+            else:
+                self._below_since = None
+
+            if decision.workers:
+                db.commit()
+                for worker in workers:
+                    self.registry.upsert(worker)
+                if self.reconciler:
+                    self.reconciler.notify()
+
+            self._log(decision)
+            return decision
+        finally:
+            db.close()
+
+    def _queued_work(self, db):
+        # Seconds of queued content per client; unknown durations use the estimator's history
+        self.estimator.refresh_if_stale(db)
+        rows = (
+            db.query(
+                models.Job.client_id,
+                func.count(models.Job.id),
+                func.count(models.Job.content_duration),
+                func.coalesce(func.sum(models.Job.content_duration), 0),
+            )
+            .filter(models.Job.status == "queued")
+            .group_by(models.Job.client_id)
+            .all()
+        )
+        queued_jobs = 0
+        queued_work = 0.0
+        for client_id, count, known, known_duration in rows:
+            queued_jobs += count
+            queued_work += float(known_duration) + (count - known) * self.estimator.expected_duration(client_id)
+        return queued_jobs, queued_work
+
+    @staticmethod
+    def _slots_per_worker(workers) -> int:
+        sizes = [w.max_jobs for w in workers if w.max_jobs]
+        return max(1, round(sum(sizes) / len(sizes))) if sizes else max(1, settings.MAX_JOBS_PER_WORKER)
+
+    def _desired_workers(self, queued_jobs, queued_work, in_flight, slots_per_worker, fleet_size) -> int:
+        for_in_flight = math.ceil(in_flight / slots_per_worker)
+        for_backlog = math.ceil(queued_work / (self.target_drain_seconds * slots_per_worker)) if queued_work else 0
+        desired = max(for_in_flight, for_backlog, 1 if queued_jobs else 0, self.min_workers)
+        upper = min(self.max_workers, fleet_size) if self.max_workers else fleet_size
+        return min(desired, upper)
+
+    def _scale_up(self, db, workers, shortfall: int, decision: ScalingDecision):
+        if self._last_scale_up and time.monotonic() - self._last_scale_up < self.scale_up_cooldown:
+            decision.reason = f"scale up by {shortfall} deferred: cooldown"
+            return
+
+        step = min(shortfall, self.max_step)
+        # Draining workers that are still running jobs come back without a boot. Transitions are
+        # guarded: the reconciler may have stopped a draining worker since it was read
+        draining = [w for w in workers if w.state == DRAINING][:step]
+        reclaim = [w for w in draining if transition_state(db, w, DRAINING, HEALTHY)]
+        stopped = [w for w in sorted(workers, key=lambda w: w.id) if w.state in (None, STOPPED)][:step - len(reclaim)]
+        start = [w for w in stopped if transition_state(db, w, w.state, STARTING)]
+
+        decision.workers = [w.name for w in reclaim + start]
+        if not decision.workers:
+            decision.reason = f"scale up by {shortfall} wanted but no stopped or draining workers left"
+            return
+        decision.action = "scale_up"
+        decision.reason = f"reclaimed {len(reclaim)}, starting {len(start)}"
+        self._last_scale_up = time.monotonic()
+
+    def _scale_down(self, db, active, surplus: int, decision: ScalingDecision):
+        now = time.monotonic()
+        if self._below_since is None:
+            self._below_since = now
+        waited = now - self._below_since
+        if waited < self.scale_down_delay:
+            decision.reason = f"surplus of {surplus} for {waited:.0f}s, waiting {self.scale_down_delay}s before scaling down"
+            return
+        if self._last_scale_down and now - self._last_scale_down < self.scale_down_cooldown:
+            decision.reason = f"scale down by {surplus} deferred: cooldown"
+            return
+
+        utcnow = datetime.utcnow()
+        candidates = [
+            w for w in active
+            if w.state == HEALTHY
+            and not w.current_jobs
+            and utcnow - (w.last_active or utcnow) >= self.idle_timeout
+            and utcnow - (w.state_changed_at or utcnow) >= self.min_lifetime
+        ]
+        # Longest-idle first
+        candidates.sort(key=lambda w: w.last_active or utcnow)
+        drain = [w for w in candidates[:min(surplus, self.max_step)] if transition_state(db, w, HEALTHY, DRAINING)]
+
+        decision.workers = [w.name for w in drain]
+        if not drain:
+            decision.reason = f"surplus of {surplus} but no worker is idle and past its minimum lifetime"
+            return
+        decision.action = "scale_down"
+        decision.reason = f"draining {len(drain)} idle worker(s)"
+        self._last_scale_down = now
+        self._below_since = None
+
+    def _log(self, decision: ScalingDecision):
+        held = decision.reason != "capacity matches demand"
+        if decision.action != "hold" or held:
+            self.decisions.append(decision)
+        message = (
+            f"Autoscaler {decision.action}: {decision.reason} "
+            f"(queued={decision.queued_jobs}, in_flight={decision.in_flight_jobs}, "
+            f"work={decision.queued_work_seconds}s, workers={decision.current_workers}->{decision.desired_workers}"
+            f"{', ' + ', '.join(decision.workers) if decision.workers else ''})"
+        )
+        if decision.action != "hold":
+            logger.info(message)
+            print(message)
+        elif held:
+            logger.info(message)
+        else:
+            logger.debug(message)
@@ -0,0 +1,69 @@
+# controller/services/dispatch_engine.py
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from config.settings import settings
+from services.worker_client import WorkerClientPool, worker_clients
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Assignment:
+    job_id: str
+    worker: object
+    worker_url: str
+    payload: dict
+
+
+@dataclass
+class DispatchResult:
+    assignment: Assignment
+    ok: bool
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+class DispatchEngine:
+    """
+    Sends a batch of job assignments to workers concurrently.
+
+    Each worker has its own keep-alive client from `clients` (a
+    WorkerClientPool), limited to DISPATCH_MAX_IN_FLIGHT_PER_WORKER concurrent
+    requests; every request is bounded by `request_timeout` seconds and its
+    outcome feeds that worker's latency stats and circuit breaker. The
+    engine owns a private event loop so the synchronous dispatch thread can
+    drive it with dispatch().
+    """
+
+    def __init__(self, request_timeout: float = settings.DISPATCH_TIMEOUT, clients: WorkerClientPool = worker_clients):
+        self.request_timeout = request_timeout
+        self.clients = clients
+        self._loop = asyncio.new_event_loop()
+
+    def dispatch(self, assignments: list) -> list:
+        if not assignments:
+            return []
+        return self._loop.run_until_complete(self._dispatch_all(assignments))
+
+    def close(self):
+        self._loop.run_until_complete(self.clients.aclose_all())
+        self._loop.close()
+
+    async def _dispatch_all(self, assignments: list) -> list:
+        await self.clients.close_retired()
+        return await asyncio.gather(*(self._send(a) for a in assignments))
+
+    async def _send(self, assignment: Assignment) -> DispatchResult:
+        # Never raises: every assignment gets a result, so the caller can settle its claim and slot
+        try:
+            client = self.clients.get(assignment.worker, assignment.worker_url)
+            ok, error, elapsed, reachable = await client.post_job(assignment.payload, self.request_timeout)
+            self.clients.record(client, ok, elapsed, error, reachable)
+        except Exception as e:
+            ok, error, elapsed = False, str(e) or e.__class__.__name__, 0.0
+        if not ok:
+            logger.error(f"Error dispatching job {assignment.job_id}: {error}")
+        return DispatchResult(assignment, ok, error=error, elapsed=elapsed)
@@ -1,15 +1,40 @@
 # ec2_manager.py
+import threading
+import time
 import boto3
+from botocore.config import Config
 from db.session import SessionLocal
 from db import models
+from config.settings import settings
+from core.cluster_bus import cluster_bus
 
-def get_boto_session(cred_id=None):
+# boto3 sessions/clients per credential id (None = the first credential).
+# Sessions are not thread-safe, so they are only used under _lock to build
+# clients; the clients themselves are safe to share between threads. Both are
+# rebuilt from the DB after EC2_CLIENT_TTL seconds, in case an invalidation
+# from another controller process was lost.
+_sessions = {}
+_clients = {}
+_loaded_at = {}
+_lock = threading.Lock()
+
+DESCRIBE_FILTER_LIMIT = 200
+
+_client_config = Config(
+    max_pool_connections=settings.EC2_MAX_POOL_CONNECTIONS,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+
+def _load_session(cred_id):
     db = SessionLocal()
-    if cred_id:
-        cred = db.query(models.S3Credential).filter(models.S3Credential.id == cred_id).first()
-    else:
-        cred = db.query(models.S3Credential).first()
-    db.close()
+    try:
+        if cred_id:
+            cred = db.query(models.S3Credential).filter(models.S3Credential.id == cred_id).first()
+        else:
+            cred = db.query(models.S3Credential).first()
+    finally:
+        db.close()
     if not cred:
         raise Exception("AWS credentials not found for the given ID")
     return boto3.Session(
@@ -18,29 +43,87 @@ def get_boto_session(cred_id=None):
         region_name=cred.region
     )
 
+def _is_fresh(cred_id):
+    loaded_at = _loaded_at.get(cred_id)
+    return loaded_at is not None and time.monotonic() - loaded_at < settings.EC2_CLIENT_TTL
+
+def _session_locked(cred_id):
+    # Caller holds _lock
+    if not _is_fresh(cred_id):
+        _sessions.pop(cred_id, None)
+        _clients.pop(cred_id, None)
+    session = _sessions.get(cred_id)
+    if session is None:
+        session = _sessions[cred_id] = _load_session(cred_id)
+        _loaded_at[cred_id] = time.monotonic()
+    return session
+
+def get_boto_session(cred_id=None):
+    with _lock:
+        return _session_locked(cred_id)
+
+def get_ec2_client(cred_id=None):
+    client = _clients.get(cred_id)
+    if client is not None and _is_fresh(cred_id):
+        return client
+    with _lock:
+        session = _session_locked(cred_id)
+        client = _clients.get(cred_id)
+        if client is None:
+            client = _clients[cred_id] = session.client('ec2', config=_client_config)
+        return client
+
+def _drop_credentials(cred_id):
+    # The "first credential" default may be that one too
+    with _lock:
+        for key in {cred_id, None}:
+            _sessions.pop(key, None)
+            _clients.pop(key, None)
+            _loaded_at.pop(key, None)
+
+def invalidate_credentials(cred_id=None):
+    # Called when a credential changes, on this process and (over the cluster bus) every other one
+    _drop_credentials(cred_id)
+    cluster_bus.publish("credentials_invalidated", cred_id=cred_id)
+
+cluster_bus.subscribe("credentials_invalidated", lambda message: _drop_credentials(message.get("cred_id")))
+
 def start_instance(instance_id, cred_id):
-    ec2 = get_boto_session(cred_id).client('ec2')
+    # Returns as soon as EC2 accepts the request; the worker reconciler tracks the boot
+    ec2 = get_ec2_client(cred_id)
     ec2.start_instances(InstanceIds=[instance_id])
     print(f"Starting EC2 instance {instance_id}...")
 
-    # Wait until instance is in running state
-    waiter = ec2.get_waiter('instance_running')
-    waiter.wait(InstanceIds=[instance_id])
-    
-    # Then wait until status checks are passed
-    print("Waiting for instance to pass system checks...")
-    status_ok_waiter = ec2.get_waiter('instance_status_ok')
-    status_ok_waiter.wait(InstanceIds=[instance_id])
-    
-    print(f"Instance {instance_id} is ready!")
-
 def stop_instance(instance_id, cred_id):
-    ec2 = get_boto_session(cred_id).client('ec2')
+    ec2 = get_ec2_client(cred_id)
     ec2.stop_instances(InstanceIds=[instance_id])
     print(f"Stopped EC2 instance {instance_id}")
 
 def is_instance_running(instance_id, cred_id):
-    ec2 = get_boto_session(cred_id).client('ec2')
+    ec2 = get_ec2_client(cred_id)
     response = ec2.describe_instances(InstanceIds=[instance_id])
     state = response['Reservations'][0]['Instances'][0]['State']['Name']
     return state == 'running'
+
+def describe_instance_states(instance_ids, cred_id):
+    """
+    Returns {instance_id: state name} for every listed instance that still
+    exists, from paginated DescribeInstances calls filtered by instance id
+    (unknown ids are simply absent instead of failing the whole call).
+    """
+    ec2 = get_ec2_client(cred_id)
+    paginator = ec2.get_paginator('describe_instances')
+    instance_ids = sorted(set(instance_ids))
+    states = {}
+    # EC2 caps the number of values in a single filter
+    for start in range(0, len(instance_ids), DESCRIBE_FILTER_LIMIT):
+        chunk = instance_ids[start:start + DESCRIBE_FILTER_LIMIT]
+        pages = paginator.paginate(
+            Filters=[{'Name': 'instance-id', 'Values': chunk}],
+            PaginationConfig={'PageSize': 1000}
+        )
+        for page in pages:
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    states[instance['InstanceId']] = instance['State']['Name']
+    return states
@@ -0,0 +1,62 @@
+# controller/services/job_cost.py
+from sqlalchemy import func
+import threading
+import time
+
+from db import models
+from config.settings import settings
+
+
+class JobCostEstimator:
+    """
+    Estimates how long a job will keep a worker busy, in seconds of source
+    content weighted by the number of extra audio/subtitle tracks.
+
+    Uses the job's own content_duration when a worker already reported it
+    (e.g. a requeued job); otherwise the average duration of earlier jobs of
+    the same client, then of all clients, then DEFAULT_JOB_DURATION.
+    """
+
+    def __init__(
+        self,
+        default_duration: float = settings.DEFAULT_JOB_DURATION,
+        audio_factor: float = settings.AUDIO_TRACK_COST_FACTOR,
+        subtitle_factor: float = settings.SUBTITLE_TRACK_COST_FACTOR,
+        refresh_interval: int = settings.JOB_COST_HISTORY_REFRESH,
+    ):
+        self.default_duration = default_duration
+        self.audio_factor = audio_factor
+        self.subtitle_factor = subtitle_factor
+        self.refresh_interval = refresh_interval
+        self._client_durations = {}
+        self._global_duration = None
+        self._lock = threading.Lock()
+        self._loaded_at = None
+
+    def refresh_if_stale(self, db):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+            return
+        rows = (
+            db.query(models.Job.client_id, func.avg(models.Job.content_duration), func.count(models.Job.id))
+            .filter(models.Job.content_duration.isnot(None), models.Job.content_duration > 0)
+            .group_by(models.Job.client_id)
+            .all()
+        )
+        total = sum(float(avg) * n for _, avg, n in rows)
+        count = sum(n for _, _, n in rows)
+        with self._lock:
+            self._client_durations = {client_id: float(avg) for client_id, avg, _ in rows}
+            self._global_duration = total / count if count else None
+            self._loaded_at = time.monotonic()
+
+    def expected_duration(self, client_id, content_duration=None) -> float:
+        if content_duration:
+            return float(content_duration)
+        with self._lock:
+            return self._client_durations.get(client_id) or self._global_duration or self.default_duration
+
+    def estimate(self, job) -> float:
+        duration = self.expected_duration(job.client_id, getattr(job, "content_duration", None))
+        audio = getattr(job, "audio_tracks", 0) or 0
+        subtitles = getattr(job, "subtitle_tracks", 0) or 0
+        return duration * (1 + self.audio_factor * audio + self.subtitle_factor * subtitles)
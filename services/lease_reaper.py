@@ -0,0 +1,78 @@
+# controller/services/lease_reaper.py
+import logging
+import threading
+
+from db.session import SessionLocal
+from db import crud
+from config.settings import settings
+from core.loops import start_loop
+from core.dispatch_signal import dispatch_wakeup
+from core.job_events import job_events
+from core.progress_cache import progress_tracker
+from services.worker_registry import worker_registry
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseReaper:
+    """
+    Periodically takes back running jobs whose lease lapsed because their
+    worker stopped heartbeating (crashed, lost network, was terminated).
+    Such jobs are requeued, or failed after JOB_MAX_ATTEMPTS, and the slot
+    they held on the worker is released.
+    """
+
+    def __init__(self, registry=worker_registry, interval: int = settings.LEASE_REAPER_INTERVAL, batch_size: int = 500):
+        self.registry = registry
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopping = threading.Event()
+
+    def start(self):
+        self._stopping = start_loop(self.run_forever)
+
+    def run_forever(self, stopping: threading.Event):
+        db = SessionLocal()
+        try:
+            adopted = crud.adopt_unleased_jobs(db)
+            if adopted:
+                print(f"Started leases for {adopted} running job(s) without one")
+        except Exception as e:
+            logger.error(f"Failed to lease running jobs: {e}")
+        finally:
+            db.close()
+
+        while not stopping.is_set():
+            try:
+                self.reap_once()
+            except Exception as e:
+                logger.error(f"Lease reaper pass failed: {e}")
+            stopping.wait(self.interval)
+
+    def stop(self):
+        self._stopping.set()
+
+    def reap_once(self) -> int:
+        db = SessionLocal()
+        try:
+            total = requeued = 0
+            while True:
+                reaped = crud.reap_expired_leases(db, limit=self.batch_size)
+                for job_id, client_id, worker_id, status in reaped:
+                    logger.warning(f"Lease expired for job {job_id} on worker {worker_id}; marked {status}")
+                    progress_tracker.forget(job_id)
+                    if worker_id:
+                        self.registry.release(worker_id, job_id)
+                    else:
+                        self.registry.finish_job(job_id)
+                    job_events.publish(job_id, "status", client_id=client_id, status=status, progress=0)
+                    requeued += status == "queued"
+                total += len(reaped)
+                if len(reaped) < self.batch_size:
+                    break
+
+            if requeued:
+                dispatch_wakeup.notify()
+            return total
+        finally:
+            db.close()
@@ -0,0 +1,324 @@
+# controller/services/worker_client.py
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+import asyncio
+import logging
+import threading
+import time
+
+import httpx
+
+from config.settings import settings
+from core.loops import start_loop
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of one worker. After `failure_threshold` of
+    them the breaker opens and the worker is kept out of placement for a
+    backoff window (doubling on every failed probe, up to `max_backoff`).
+    Once the window has passed, a background health probe runs half-open:
+    success closes the breaker, failure re-opens it. Real jobs are never
+    used as probes.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = settings.WORKER_BREAKER_FAILURES,
+        backoff: float = settings.WORKER_BREAKER_BACKOFF,
+        max_backoff: float = settings.WORKER_BREAKER_MAX_BACKOFF,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = backoff
+        self.opened_at = None
+
+    @property
+    def allows_traffic(self) -> bool:
+        return self.state == CLOSED
+
+    def probe_due(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at >= self.backoff
+
+    def start_probe(self):
+        self.state = HALF_OPEN
+
+    def record_success(self) -> bool:
+        # Returns True when this closed an open breaker
+        reopened = self.state != CLOSED
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = self.base_backoff
+        self.opened_at = None
+        return reopened
+
+    def record_failure(self) -> bool:
+        # Returns True when this opened the breaker
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        elif self.state == OPEN or self.consecutive_failures < self.failure_threshold:
+            return False
+        was_closed = self.state == CLOSED
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        return was_closed
+
+    def retry_in(self) -> Optional[float]:
+        if self.state != OPEN:
+            return None
+        return max(0.0, self.backoff - (time.monotonic() - self.opened_at))
+
+
+@dataclass
+class WorkerStats:
+    requests: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    last_success_at: Optional[float] = None
+    # Recent round-trip times in seconds, for percentiles
+    latencies: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def record(self, ok: bool, elapsed: float, error: Optional[str] = None):
+        self.requests += 1
+        self.latencies.append(elapsed)
+        if ok:
+            self.last_success_at = time.time()
+        else:
+            self.failures += 1
+            self.last_error = error
+
+    def latency_ms(self, quantile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return round(ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] * 1000, 1)
+
+
+class WorkerClient:
+    """
+    Keep-alive HTTP connections to one worker: an AsyncClient for dispatch
+    (driven by the dispatch engine's loop) and a sync Client for health
+    probes, plus the worker's request stats and circuit breaker.
+    """
+
+    def __init__(self, key, name: str, base_url: str, max_in_flight: int = settings.DISPATCH_MAX_IN_FLIGHT_PER_WORKER):
+        self.key = key
+        self.name = name
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.breaker = CircuitBreaker()
+        self.stats = WorkerStats()
+        self._limits = httpx.Limits(
+            max_connections=max_in_flight,
+            max_keepalive_connections=max_in_flight,
+            keepalive_expiry=settings.WORKER_KEEPALIVE_EXPIRY,
+        )
+        self._async: Optional[httpx.AsyncClient] = None
+        self._sync: Optional[httpx.Client] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+
+    async def post_job(self, payload: dict, timeout: float) -> tuple:
+        """Sends one job; returns (ok, error, elapsed, worker_reachable)."""
+        started = time.monotonic()
+        try:
+            if self._async is None:
+                self._async = httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=self._limits)
+                self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        except Exception as e:
+            # e.g. httpx.InvalidURL from a malformed worker address
+            return False, str(e) or e.__class__.__name__, 0.0, False
+        async with self._in_flight:
+            try:
+                response = await asyncio.wait_for(self._async.post("/api/run-job", json=payload), timeout=timeout)
+                elapsed = time.monotonic() - started
+                if response.status_code == 200:
+                    return True, None, elapsed, True
+                # A 4xx came from a live worker; only 5xx counts against the breaker
+                return False, response.text, elapsed, response.status_code < 500
+            except asyncio.TimeoutError:
+                error = f"Dispatch timed out after {timeout}s"
+            except httpx.HTTPError as e:
+                error = str(e) or e.__class__.__name__
+            except Exception as e:
+                # Anything else (httpx.InvalidURL is not an HTTPError) fails this send only, not the batch
+                error = str(e) or e.__class__.__name__
+            return False, error, time.monotonic() - started, False
+
+    def check_health(self, timeout: float = settings.WORKER_HEALTH_TIMEOUT) -> bool:
+        started = time.monotonic()
+        try:
+            if self._sync is None:
+                self._sync = httpx.Client(base_url=self.base_url, limits=httpx.Limits(max_connections=1))
+            ok = self._sync.get("/health", timeout=timeout).status_code == 200
+            error = None if ok else "health check returned non-200"
+        except Exception as e:
+            ok, error = False, str(e) or e.__class__.__name__
+        self.stats.record(ok, time.monotonic() - started, error)
+        return ok
+
+    async def aclose(self):
+        if self._async is not None:
+            await self._async.aclose()
+            self._async = None
+
+    def close(self):
+        if self._sync is not None:
+            self._sync.close()
+            self._sync = None
+
+    def describe(self) -> dict:
+        return {
+            "worker_id": self.key if isinstance(self.key, int) else None,
+            "name": self.name,
+            "url": self.base_url,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "retry_in_seconds": self.breaker.retry_in(),
+            "requests": self.stats.requests,
+            "failures": self.stats.failures,
+            "last_error": self.stats.last_error,
+            "latency_p50_ms": self.stats.latency_ms(0.5),
+            "latency_p95_ms": self.stats.latency_ms(0.95),
+        }
+
+
+class WorkerClientPool:
+    """
+    One WorkerClient per worker (keyed by worker id), reused across
+    dispatch passes so connections stay warm. A client is replaced when
+    the worker's address changes (a restarted instance gets a new IP).
+
+    Listeners are told (worker_id, available) whenever a breaker opens or
+    closes, so placement can skip workers known to be down. start_prober()
+    performs the half-open health probes in the background.
+    """
+
+    def __init__(self, probe_interval: float = settings.WORKER_PROBE_INTERVAL):
+        self.probe_interval = probe_interval
+        self._clients = {}
+        self._retired = []
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._stopping = threading.Event()
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def get(self, worker, base_url: Optional[str] = None) -> WorkerClient:
+        base_url = base_url or f"http://{worker.public_ip}:{settings.WORKERPORT}"
+        key = getattr(worker, "id", None) or base_url
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None and client.base_url == base_url:
+                return client
+            # New worker, or a restarted one with a new address: start with a closed breaker
+            was_blocked = client is not None and not client.breaker.allows_traffic
+            if client is not None:
+                self._retire(client)
+            client = self._clients[key] = WorkerClient(key, worker.name, base_url)
+        if was_blocked:
+            self._notify(client)
+        return client
+
+    def is_available(self, worker_id) -> bool:
+        with self._lock:
+            client = self._clients.get(worker_id)
+        return client is None or client.breaker.allows_traffic
+
+    def record(self, client: WorkerClient, ok: bool, elapsed: float, error: Optional[str] = None, reachable: bool = False):
+        client.stats.record(ok, elapsed, error)
+        self._update_breaker(client, ok or reachable)
+
+    def mark_healthy(self, worker):
+        # A successful health probe (e.g. from the boot check) closes the worker's breaker
+        self._update_breaker(self.get(worker), True)
+
+    def forget(self, worker_id):
+        with self._lock:
+            client = self._clients.pop(worker_id, None)
+            if client is not None:
+                self._retire(client)
+
+    def probe_once(self) -> int:
+        with self._lock:
+            due = [c for c in self._clients.values() if c.breaker.probe_due()]
+            for client in due:
+                client.breaker.start_probe()
+        for client in due:
+            self._update_breaker(client, client.check_health())
+        return len(due)
+
+    def start_prober(self):
+        self._stopping = start_loop(self.run_prober)
+
+    def run_prober(self, stopping: threading.Event):
+        while not stopping.is_set():
+            try:
+                self.probe_once()
+            except Exception as e:
+                logger.error(f"Worker probe pass failed: {e}")
+            stopping.wait(self.probe_interval)
+
+    def stop_prober(self):
+        self._stopping.set()
+
+    async def close_retired(self):
+        # Called from the dispatch engine's loop, which owns the async connections
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for client in retired:
+            await client.aclose()
+
+    async def aclose_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
+            client.close()
+        await self.close_retired()
+
+    def stats(self) -> list:
+        with self._lock:
+            return [client.describe() for client in self._clients.values()]
+
+    def _retire(self, client: WorkerClient):
+        client.close()
+        self._retired.append(client)
+
+    def _update_breaker(self, client: WorkerClient, ok: bool):
+        with self._lock:
+            changed = client.breaker.record_success() if ok else client.breaker.record_failure()
+        if not changed:
+            return
+        if client.breaker.allows_traffic:
+            print(f"Worker {client.name} is reachable again")
+        else:
+            logger.warning(
+                f"Worker {client.name} failed {client.breaker.consecutive_failures} request(s) in a row; "
+                f"taking it out of placement for {client.breaker.backoff:.0f}s"
+            )
+        self._notify(client)
+
+    def _notify(self, client: WorkerClient):
+        if not isinstance(client.key, int):
+            return
+        for listener in self._listeners:
+            try:
+                listener(client.key, client.breaker.allows_traffic)
+            except Exception as e:
+                logger.error(f"Worker availability listener failed for {client.name}: {e}")
+
+
+worker_clients = WorkerClientPool()
@@ -2,11 +2,13 @@
 from db.session import SessionLocal
 from db import crud, models
 from config.settings import settings
-from services.ec2_manager import start_instance, stop_instance, is_instance_running
-from datetime import datetime, timezone, timedelta
+from services.dispatch_engine import DispatchEngine, Assignment
+from services.worker_lifecycle import STOPPED, STARTING, BOOTING, set_state
+from services.worker_registry import worker_registry
+from core.fair_scheduler import FairScheduler
+from services.job_cost import JobCostEstimator
+from core.job_events import job_events
 import logging
-import time
-import requests
 
 from types import SimpleNamespace
 
@@ -14,54 +16,38 @@ logger = logging.getLogger(__name__)
 
 MAX_JOBS_PER_WORKER = settings.MAX_JOBS_PER_WORKER
 MAX_CONCURRENT_JOBS = settings.MAX_CONCURRENT_JOBS
-IDLE_TIMEOUT = timedelta(minutes=settings.POLL_INTERVAL)
 IS_PRODUCTION = settings.IS_PRODUCTION
 WORKERPORT = settings.WORKERPORT
+# Placements tried per job when the registry's view of a worker turns out stale
+RESERVE_ATTEMPTS = 3
+# Selections tried per pass when other controllers claimed every selected job first
+CLAIM_ATTEMPTS = 3
 
 
 class WorkerDispatcher:
-    def __init__(self):
-        pass
+    def __init__(self, reconciler=None, registry=worker_registry, scheduler=None, autoscaler=None, partition=None):
+        self.engine = DispatchEngine()
+        self.reconciler = reconciler
+        self.autoscaler = autoscaler
+        self.registry = registry
+        # Partitioned dispatch: place only on workers this controller owns
+        self.partition = partition
+        self.estimator = JobCostEstimator()
+        self.scheduler = scheduler or FairScheduler(cost_fn=self.estimator.estimate)
 
     def get_available_worker(self, db):
         if IS_PRODUCTION:
-            workers = db.query(models.WorkerInstance).all()
-            for worker in workers:
-                if worker.current_jobs < worker.max_jobs:
-
-                    if not worker.is_active:
-                        print(f"Starting instance {worker.name}...")
-                        start_instance(worker.instance_id, worker.ec2_credential_id)
-
-                        # Step 1: Wait for instance to enter 'running' state
-                        while not is_instance_running(worker.instance_id, worker.ec2_credential_id):
-                            print(f"Waiting for {worker.name} to boot EC2...")
-                            time.sleep(5)
-
-                        print(f"EC2 instance for {worker.name} is running.")
-
-                        # Step 2: Wait for FastAPI service to respond on /api/ping
-                        worker_url = f"http://{worker.public_ip}:9000/health"
-                        for _ in range(20):  # Try for ~20 x 3s = 60s
-                            try:
-                                response = requests.get(worker_url, timeout=2)
-                                if response.status_code == 200:
-                                    print(f"FastAPI on {worker.name} is ready.")
-                                    break
-                            except requests.exceptions.RequestException:
-                                pass
-                            print(f"Waiting for {worker.name} API to become ready...")
-                            time.sleep(3)
-                        else:
-                            logger.error(f"FastAPI on {worker.name} not responding. Skipping.")
-                            continue
-
-                        # Step 3: Mark instance as active
-                        worker.is_active = True
-                        db.commit()
-
-                    return worker
-                
+            # Only healthy workers take jobs; booting capacity is handled by the reconciler
+            self.registry.refresh_if_stale(db)
+            worker = self.registry.place()
+            if worker:
+                return worker
+
+            # Capacity decisions belong to the autoscaler; just make it look now
+            if self.autoscaler:
+                self.autoscaler.notify()
+            else:
+                self.request_capacity(db)
             return None
         else:
             # Local development mode: use a dummy/local worker
@@ -72,6 +58,27 @@ class WorkerDispatcher:
             return worker
     
 
+    def reserve_worker(self, db, job, cost: float = 0.0):
+        """
+        Picks a worker for the job and takes one of its slots in the database.
+        The registry is only a placement hint: if its copy was stale and the
+        guarded reservation finds the worker full, refresh and try again.
+        """
+        for _ in range(RESERVE_ATTEMPTS):
+            worker = self.get_available_worker(db)
+            if not worker or not IS_PRODUCTION:
+                return worker
+            if self.partition is not None and not self.partition.owns(worker.id):
+                # Partitions moved since the worker was indexed
+                self.registry.rebalance()
+                continue
+            if crud.reserve_worker_slot(db, worker.id, job.id):
+                self.registry.reserve(worker.id, job.job_id, cost)
+                return worker
+            logger.info(f"Worker {worker.name} was already full; refreshing worker state")
+            self.registry.invalidate()
+        return None
+
     def dispatch_pending_jobs(self):
         db = SessionLocal()
         try:
@@ -79,92 +86,121 @@ class WorkerDispatcher:
             slots_available = MAX_CONCURRENT_JOBS - running
             if slots_available <= 0:
                 print("Max concurrent jobs running. Waiting...")
-                return
-
-            pending_jobs = crud.get_pending_jobs(db, limit=slots_available)
-            for job in pending_jobs:
-                worker = self.get_available_worker(db)
+                return 0
+
+            if self.partition is not None and IS_PRODUCTION:
+                # Only claim what this partition's workers can take; the rest is left to other controllers
+                self.registry.refresh_if_stale(db)
+                slots_available = min(slots_available, self.registry.free_slots())
+                if slots_available <= 0:
+                    if self.autoscaler:
+                        self.autoscaler.notify()
+                    return 0
+
+            # The fair scheduler picks which jobs go next; claiming marks them "dispatched"
+            # so no other controller can pick them up
+            self.estimator.refresh_if_stale(db)
+            self.scheduler.sync(db)
+            for _ in range(CLAIM_ATTEMPTS):
+                selected = self.scheduler.select(slots_available)
+                if not selected:
+                    return 0
+                claimed = {
+                    job.job_id: job
+                    for job in crud.claim_jobs(
+                        db, limit=len(selected), status="dispatched", progress=5,
+                        job_ids=[s.job_id for s in selected]
+                    )
+                }
+                # Nothing claimed: other controllers took every selected job, pick again from what is left
+                if claimed:
+                    break
+            selected = [s for s in selected if s.job_id in claimed]
+            claimed_jobs = [claimed[s.job_id] for s in selected]
+            job_pks = {job.job_id: job.id for job in claimed_jobs}
+
+            assignments = []
+            for index, job in enumerate(claimed_jobs):
+                cost = selected[index].cost
+                worker = self.reserve_worker(db, job, cost)
                 if not worker:
                     logger.warning("No available worker found.")
+                    crud.release_jobs(db, [j.job_id for j in claimed_jobs[index:]])
+                    self.scheduler.requeue(selected[index:])
                     break
 
-                worker_url = f"http://{worker.public_ip}:{WORKERPORT}"
-
                 print(f"Dispatching {job.job_id} to {worker.name}")
 
-                crud.update_job_status(db, job.job_id, "dispatched", progress=5)
-
-                if IS_PRODUCTION:
-                    worker.current_jobs += 1
-                    worker.last_used = datetime.utcnow()
-                    db.commit()
-
-                job_data = {
-                    "job_id": job.job_id,
-                    "content_id": job.content_id,
-                    "client_id": job.client_id,
-                    "s3_input_id": str(job.s3_input_id),
-                    "s3_output_id": str(job.s3_output_id),
-                    "is_paid": job.is_paid,
-                    "upload_to_s3": job.upload_to_s3,
-                    "s3_source": job.s3_source,
-                    "s3_destination": job.s3_destination,
-                    "already_transcoded": job.already_transcoded,
-                }
-
-                try:
-                    response = requests.post(f"{worker_url}/api/run-job", json=job_data, timeout=10)
-                    if response.status_code == 200:
-                        crud.update_job_status(db, job.job_id, "processing", progress=10)
-                        print(f"Job {job.job_id} dispatched to {worker.name}")
-                    else:
-                        crud.update_job_status(db, job.job_id, "failed", error=response.text)
-                        logger.error(f"Job {job.job_id} dispatch failed")
-                        if IS_PRODUCTION:
-                            worker.current_jobs -= 1
-                            db.commit()
-                except Exception as e:
-                    crud.update_job_status(db, job.job_id, "failed", error=str(e))
-                    logger.error(f"Error dispatching job: {e}")
-                    if IS_PRODUCTION:
-                        worker.current_jobs -= 1
-                        db.commit()
-
-            if IS_PRODUCTION:
-                self.shutdown_idle_workers(db)
-
-        finally:
-            db.close()
-
-    def shutdown_idle_workers(self, db):
-        if not IS_PRODUCTION:
-            return  # Do nothing in development
-
-        workers = db.query(models.WorkerInstance).filter(
-            models.WorkerInstance.current_jobs == 0,
-            models.WorkerInstance.is_active == True
-        ).all()
-        for worker in workers:
-            print(f"Shutting down idle worker {worker.name}")
-            stop_instance(worker.instance_id, worker.ec2_credential_id)
-            worker.is_active = False
+                assignments.append(Assignment(
+                    job_id=job.job_id,
+                    worker=worker,
+                    worker_url=f"http://{worker.public_ip}:{WORKERPORT}",
+                    payload=self.build_job_payload(job),
+                ))
             db.commit()
 
+            # Send the whole batch concurrently, then record every outcome in one round trip
+            status_updates = []
+            dispatched = 0
+            for result in self.engine.dispatch(assignments):
+                assignment = result.assignment
+                if result.ok:
+                    dispatched += 1
+                    status_updates.append({
+                        "id": job_pks[assignment.job_id], "status": "processing", "progress": 10,
+                        "worker_id": getattr(assignment.worker, "id", None),
+                    })
+                    print(f"Job {assignment.job_id} dispatched to {assignment.worker.name}")
+                else:
+                    status_updates.append({"id": job_pks[assignment.job_id], "status": "failed", "progress": 0, "error": result.error})
+                    logger.error(f"Job {assignment.job_id} dispatch failed")
+                    if IS_PRODUCTION and crud.release_job_slot(db, job_pks[assignment.job_id], assignment.worker.id):
+                        self.registry.release(assignment.worker.id, assignment.job_id)
+            crud.bulk_update_job_status(db, status_updates)
+            for assignment, update in zip(assignments, status_updates):
+                job_events.publish(
+                    assignment.job_id, "status", client_id=assignment.payload["client_id"],
+                    status=update["status"], progress=update["progress"]
+                )
+
+            return dispatched
 
-    def monitor_workers(self):
-        if not IS_PRODUCTION:
-            return  # Skip monitoring in dev
-
-        db = SessionLocal()
-        try:
-            workers = db.query(models.WorkerInstance).filter(
-                models.WorkerInstance.is_active == True
-            ).all()
-            for worker in workers:
-                if worker.current_jobs == 0 and datetime.now(timezone.utc) - worker.last_active > IDLE_TIMEOUT:
-                    stop_instance(worker.instance_id, worker.ec2_credential_id)
-                    worker.is_active = False
-                    db.commit()
-                    print(f"Stopped idle worker {worker.name}")
         finally:
             db.close()
+
+    @staticmethod
+    def build_job_payload(job):
+        return {
+            "job_id": job.job_id,
+            "content_id": job.content_id,
+            "client_id": job.client_id,
+            "s3_input_id": str(job.s3_input_id),
+            "s3_output_id": str(job.s3_output_id),
+            "is_paid": job.is_paid,
+            "upload_to_s3": job.upload_to_s3,
+            "s3_source": job.s3_source,
+            "s3_destination": job.s3_destination,
+            "already_transcoded": job.already_transcoded,
+        }
+
+    def request_capacity(self, db):
+        # Ask the reconciler to boot one more worker unless one is already on its way
+        booting = db.query(models.WorkerInstance).filter(
+            models.WorkerInstance.state.in_([STARTING, BOOTING])
+        ).count()
+        if booting:
+            return
+
+        worker = db.query(models.WorkerInstance).filter(
+            models.WorkerInstance.state == STOPPED,
+            models.WorkerInstance.is_active == False
+        ).order_by(models.WorkerInstance.id.asc()).first()
+        if not worker:
+            return
+
+        print(f"Requesting start of instance {worker.name}...")
+        set_state(worker, STARTING)
+        db.commit()
+        self.registry.upsert(worker)
+        if self.reconciler:
+            self.reconciler.notify()
@@ -0,0 +1,238 @@
+# controller/services/worker_lifecycle.py
+from sqlalchemy.orm.attributes import set_committed_value
+
+from db.session import SessionLocal
+from db import crud, models
+from config.settings import settings
+from core.loops import start_loop
+from core.dispatch_signal import dispatch_wakeup
+from services.ec2_manager import start_instance, stop_instance, describe_instance_states
+from services.worker_client import worker_clients
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STOPPED = "stopped"
+STARTING = "starting"
+BOOTING = "booting"
+HEALTHY = "healthy"
+DRAINING = "draining"
+
+# EC2 states in which the instance is (or is about to be) up
+EC2_UP_STATES = ("pending", "running")
+# Credential lookup failed; don't act on this instance's state
+EC2_UNKNOWN = "unknown"
+
+WORKERPORT = settings.WORKERPORT
+BOOT_TIMEOUT = timedelta(seconds=settings.WORKER_BOOT_TIMEOUT)
+
+
+def _state_values(state: str) -> dict:
+    return {"state": state, "state_changed_at": datetime.utcnow(), "is_active": state in (BOOTING, HEALTHY, DRAINING)}
+
+
+def set_state(worker, state: str):
+    for key, value in _state_values(state).items():
+        setattr(worker, key, value)
+
+
+def transition_state(db, worker, from_state: Optional[str], state: str) -> bool:
+    # set_state() that only applies while the row is still in `from_state`; caller commits
+    values = _state_values(state)
+    if not crud.transition_worker_state(db, worker.id, from_state, values):
+        return False
+    for key, value in values.items():
+        # Already written; keep the ORM from flushing it again over a later change
+        set_committed_value(worker, key, value)
+    return True
+
+
+def probe_health(worker) -> bool:
+    # Reuses the worker's keep-alive client; a healthy answer also closes its circuit breaker
+    if not worker_clients.get(worker).check_health():
+        return False
+    worker_clients.mark_healthy(worker)
+    return True
+
+
+class WorkerReconciler:
+    """
+    Advances WorkerInstance.state in the background so EC2 boots never block
+    dispatching. The dispatcher (or autoscaler) only requests transitions by
+    setting `starting` / `draining`; every slow EC2 or HTTP call happens here.
+
+    EC2 state is read in bulk: one paginated DescribeInstances per credential
+    per pass, for booting workers only, and for the whole fleet every
+    `fleet_interval` seconds. The full check also corrects drift (instances
+    stopped or started outside the controller) in the same transaction.
+    """
+
+    def __init__(
+        self,
+        interval: int = settings.WORKER_RECONCILE_INTERVAL,
+        registry=None,
+        fleet_interval: int = settings.WORKER_FLEET_SYNC_INTERVAL,
+        partition=None,
+    ):
+        self.interval = interval
+        self.registry = registry
+        self.fleet_interval = fleet_interval
+        # Partitioned dispatch: only reconcile the workers this controller owns
+        self.partition = partition
+        self._fleet_synced_at = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        self._stopping = start_loop(self.run_forever)
+
+    def run_forever(self, stopping: threading.Event):
+        while not stopping.is_set():
+            try:
+                self.reconcile_once()
+            except Exception as e:
+                logger.error(f"Worker reconcile pass failed: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def reconcile_once(self):
+        db = SessionLocal()
+        try:
+            fleet_due = self._fleet_synced_at is None or time.monotonic() - self._fleet_synced_at >= self.fleet_interval
+            query = db.query(models.WorkerInstance)
+            if not fleet_due:
+                query = query.filter(
+                    (models.WorkerInstance.state != STOPPED) | (models.WorkerInstance.is_active == True)
+                )
+            workers = query.all()
+            if self.partition is not None:
+                workers = [w for w in workers if self.partition.owns(w.id)]
+
+            described = workers if fleet_due else [w for w in workers if w.state == BOOTING]
+            ec2_states = self._describe(described) if described else {}
+            if fleet_due:
+                self._fleet_synced_at = time.monotonic()
+
+            became_healthy = False
+            lost = []
+            for worker in workers:
+                if fleet_due and self._correct_drift(worker, ec2_states.get(worker.instance_id), lost):
+                    continue
+                if worker.state == STARTING:
+                    self._start(worker)
+                elif worker.state == BOOTING:
+                    became_healthy |= self._check_boot(db, worker, ec2_states.get(worker.instance_id))
+                elif worker.state == DRAINING:
+                    self._drain(db, worker)
+                elif worker.state in (None, STOPPED) and worker.is_active:
+                    # Running instance recorded before lifecycle states existed: verify it first
+                    print(f"Re-checking active worker {worker.name}")
+                    set_state(worker, BOOTING)
+            # Counters of lost workers were reset; their jobs must not release slots again
+            crud.forget_worker_slots(db, lost)
+            db.commit()
+
+            if self.registry:
+                for worker in workers:
+                    self.registry.upsert(worker)
+            if became_healthy:
+                dispatch_wakeup.notify()
+        finally:
+            db.close()
+
+    def _describe(self, workers) -> dict:
+        # instance_id -> EC2 state, one paginated call per credential
+        by_credential = defaultdict(list)
+        for worker in workers:
+            by_credential[worker.ec2_credential_id].append(worker.instance_id)
+
+        states = {}
+        for cred_id, instance_ids in by_credential.items():
+            try:
+                found = describe_instance_states(instance_ids, cred_id)
+            except Exception as e:
+                logger.error(f"Failed to describe {len(instance_ids)} instances for credential {cred_id}: {e}")
+                found = dict.fromkeys(instance_ids, EC2_UNKNOWN)
+            states.update(found)
+        return states
+
+    def _correct_drift(self, worker, ec2_state, lost: list) -> bool:
+        # ec2_state is None when the instance no longer exists
+        if ec2_state == EC2_UNKNOWN:
+            return False
+        up = ec2_state in EC2_UP_STATES
+
+        if worker.state in (HEALTHY, DRAINING) and not up:
+            logger.warning(f"Worker {worker.name} is {ec2_state or 'gone'} in EC2; marking it stopped")
+            set_state(worker, STOPPED)
+            worker.current_jobs = 0
+            lost.append(worker.id)
+            return True
+        if worker.state in (None, STOPPED) and up:
+            # Started outside the controller: verify it and put it to use
+            print(f"Worker {worker.name} is {ec2_state} in EC2; checking its health")
+            set_state(worker, BOOTING)
+            return True
+        if worker.state in (None, STOPPED) and worker.is_active:
+            set_state(worker, STOPPED)
+            return True
+        return False
+
+    def _start(self, worker):
+        try:
+            start_instance(worker.instance_id, worker.ec2_credential_id)
+            set_state(worker, BOOTING)
+        except Exception as e:
+            logger.error(f"Failed to start worker {worker.name}: {e}")
+            set_state(worker, STOPPED)
+
+    def _check_boot(self, db, worker, ec2_state) -> bool:
+        if datetime.utcnow() - worker.state_changed_at > BOOT_TIMEOUT:
+            logger.error(f"Worker {worker.name} did not become healthy in time. Stopping it.")
+            self._stop(db, worker)
+            return False
+
+        if ec2_state != "running":
+            print(f"Waiting for {worker.name} to boot EC2...")
+            return False
+
+        if not probe_health(worker):
+            print(f"Waiting for {worker.name} API to become ready...")
+            return False
+
+        print(f"Worker {worker.name} is healthy.")
+        set_state(worker, HEALTHY)
+        worker.last_active = datetime.utcnow()
+        return True
+
+    def _drain(self, db, worker):
+        if worker.current_jobs and worker.current_jobs > 0:
+            return
+        print(f"Shutting down drained worker {worker.name}")
+        self._stop(db, worker)
+
+    def _stop(self, db, worker):
+        # Claim the row first: the autoscaler may have reclaimed a draining worker since it was read.
+        # The guarded UPDATE also holds the row lock until commit, so a reclaim cannot slip in after
+        from_state = worker.state
+        if not transition_state(db, worker, from_state, STOPPED):
+            print(f"Worker {worker.name} left {from_state} meanwhile; not stopping it")
+            return
+        try:
+            stop_instance(worker.instance_id, worker.ec2_credential_id)
+        except Exception as e:
+            logger.error(f"Failed to stop worker {worker.name}: {e}")
+            # Retried on the next pass
+            transition_state(db, worker, STOPPED, from_state)
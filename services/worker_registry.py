@@ -0,0 +1,252 @@
+# controller/services/worker_registry.py
+from dataclasses import dataclass
+from datetime import datetime
+from bisect import bisect_left, insort
+from typing import Optional
+import threading
+import time
+
+from db import models
+from config.settings import settings
+from services.worker_client import worker_clients
+from services.worker_lifecycle import HEALTHY
+
+
+@dataclass
+class WorkerSnapshot:
+    id: int
+    name: str
+    instance_id: str
+    public_ip: str
+    current_jobs: int
+    max_jobs: int
+    state: str
+    ec2_credential_id: Optional[int] = None
+    last_used: Optional[datetime] = None
+    # Estimated seconds of work assigned by this controller and not yet finished
+    load: float = 0.0
+
+    @property
+    def free_slots(self) -> int:
+        return self.max_jobs - self.current_jobs
+
+    @property
+    def placeable(self) -> bool:
+        return self.state == HEALTHY and self.free_slots > 0
+
+    @classmethod
+    def from_model(cls, worker: models.WorkerInstance):
+        return cls(
+            id=worker.id,
+            name=worker.name,
+            instance_id=worker.instance_id,
+            public_ip=worker.public_ip,
+            current_jobs=worker.current_jobs or 0,
+            max_jobs=worker.max_jobs or 0,
+            state=worker.state,
+            ec2_credential_id=worker.ec2_credential_id,
+            last_used=worker.last_used,
+        )
+
+
+class PlacementPolicy:
+    """
+    Keeps placeable workers in a list sorted by `key()` so a placement is a
+    bisect (O(log n)) rather than a scan. Subclasses choose the ordering.
+    """
+
+    def __init__(self):
+        self._index = []
+        self._keys = {}
+
+    def key(self, worker: WorkerSnapshot) -> tuple:
+        raise NotImplementedError
+
+    def add(self, worker: WorkerSnapshot):
+        key = self.key(worker) + (worker.id,)
+        self._keys[worker.id] = key
+        insort(self._index, key)
+
+    def remove(self, worker_id: int):
+        key = self._keys.pop(worker_id, None)
+        if key is not None:
+            del self._index[bisect_left(self._index, key)]
+
+    def clear(self):
+        self._index.clear()
+        self._keys.clear()
+
+    def worker_ids(self):
+        return self._keys.keys()
+
+    def select(self, slots: int = 1) -> Optional[int]:
+        return self._index[0][-1] if self._index else None
+
+
+class LeastLoadedPolicy(PlacementPolicy):
+    # Lowest utilisation first, ties broken by fewest running jobs
+    def key(self, worker):
+        return (worker.current_jobs / worker.max_jobs, worker.current_jobs)
+
+
+class BestFitPolicy(PlacementPolicy):
+    # Tightest worker that still fits the job, keeping whole workers free for big jobs
+    def key(self, worker):
+        return (worker.free_slots,)
+
+    def select(self, slots: int = 1):
+        position = bisect_left(self._index, (slots,))
+        return self._index[position][-1] if position < len(self._index) else None
+
+
+class SpreadPolicy(PlacementPolicy):
+    # Least recently used worker first, spreading jobs across the fleet
+    def key(self, worker):
+        return (worker.last_used or datetime.min,)
+
+
+class BalancedPolicy(PlacementPolicy):
+    # Least outstanding estimated work first, so long and short jobs even out across workers
+    def key(self, worker):
+        return (worker.load, worker.current_jobs)
+
+
+PLACEMENT_POLICIES = {
+    "least_loaded": LeastLoadedPolicy,
+    "best_fit": BestFitPolicy,
+    "spread": SpreadPolicy,
+    "balanced": BalancedPolicy,
+}
+
+
+class WorkerRegistry:
+    """
+    In-memory view of worker_instances used for placement. Reloaded from the
+    DB every `refresh_interval` seconds and kept current in between by the
+    dispatcher, the lifecycle reconciler and job status updates. Estimated
+    work per worker is tracked from this controller's own assignments.
+    """
+
+    def __init__(
+        self,
+        policy: str = settings.WORKER_PLACEMENT_POLICY,
+        refresh_interval: int = settings.WORKER_REGISTRY_REFRESH,
+    ):
+        if policy not in PLACEMENT_POLICIES:
+            raise ValueError(f"Unknown placement policy: {policy}")
+        self.policy = PLACEMENT_POLICIES[policy]()
+        self.refresh_interval = refresh_interval
+        self._workers = {}
+        self._assignments = {}
+        # Workers whose circuit breaker is open: known down, kept out of placement
+        self._unavailable = set()
+        # Partitioned dispatch: only workers this controller owns are placeable
+        self.partition = None
+        self._lock = threading.RLock()
+        self._loaded_at = None
+
+    def refresh(self, db):
+        workers = db.query(models.WorkerInstance).all()
+        with self._lock:
+            loads = {worker_id: w.load for worker_id, w in self._workers.items()}
+            self._workers.clear()
+            self.policy.clear()
+            for worker in workers:
+                snapshot = WorkerSnapshot.from_model(worker)
+                snapshot.load = loads.get(worker.id, 0.0)
+                self._put(snapshot)
+            self._loaded_at = time.monotonic()
+
+    def refresh_if_stale(self, db):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.refresh(db)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def upsert(self, worker: models.WorkerInstance):
+        with self._lock:
+            self._put(self._snapshot(worker))
+
+    def get(self, worker_id: int) -> Optional[WorkerSnapshot]:
+        return self._workers.get(worker_id)
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._workers.values())
+
+    def place(self, slots: int = 1) -> Optional[WorkerSnapshot]:
+        with self._lock:
+            worker_id = self.policy.select(slots)
+            return self._workers[worker_id] if worker_id is not None else None
+
+    def free_slots(self) -> int:
+        # Free slots across placeable workers (in this controller's partition)
+        with self._lock:
+            return sum(self._workers[worker_id].free_slots for worker_id in self.policy.worker_ids())
+
+    def reserve(self, worker_id: int, job_id: Optional[str] = None, cost: float = 0.0):
+        with self._lock:
+            if job_id:
+                self._assignments[job_id] = (worker_id, cost)
+            self._adjust(worker_id, 1, cost)
+
+    def release(self, worker_id: int, job_id: Optional[str] = None):
+        with self._lock:
+            _, cost = self._assignments.pop(job_id, (worker_id, 0.0))
+            self._adjust(worker_id, -1, -cost)
+
+    def rebalance(self):
+        # Ownership changed: re-index every known worker under the current partition
+        with self._lock:
+            for worker in list(self._workers.values()):
+                self._put(worker)
+
+    def set_available(self, worker_id: int, available: bool):
+        with self._lock:
+            if available:
+                self._unavailable.discard(worker_id)
+            else:
+                self._unavailable.add(worker_id)
+            worker = self._workers.get(worker_id)
+            if worker:
+                self._put(worker)
+
+    def finish_job(self, job_id: str):
+        # Drops the job's estimated work once it leaves the worker; slot counts come from the DB
+        with self._lock:
+            assignment = self._assignments.pop(job_id, None)
+            if assignment:
+                worker_id, cost = assignment
+                self._adjust(worker_id, 0, -cost)
+
+    def _adjust(self, worker_id: int, delta: int, cost: float = 0.0):
+        with self._lock:
+            worker = self._workers.get(worker_id)
+            if not worker:
+                return
+            worker.current_jobs = max(worker.current_jobs + delta, 0)
+            worker.load = max(worker.load + cost, 0.0)
+            if delta > 0:
+                worker.last_used = datetime.utcnow()
+            self._put(worker)
+
+    def _snapshot(self, worker: models.WorkerInstance) -> WorkerSnapshot:
+        snapshot = WorkerSnapshot.from_model(worker)
+        existing = self._workers.get(worker.id)
+        snapshot.load = existing.load if existing else 0.0
+        return snapshot
+
+    def _put(self, worker: WorkerSnapshot):
+        self.policy.remove(worker.id)
+        self._workers[worker.id] = worker
+        if (
+            worker.placeable
+            and worker.id not in self._unavailable
+            and (self.partition is None or self.partition.owns(worker.id))
+        ):
+            self.policy.add(worker)
+
+
+worker_registry = WorkerRegistry()
+worker_clients.add_listener(worker_registry.set_available)
@@ -2,6 +2,7 @@
 
 import os
 import subprocess
+import sys
 
 
 REQUIREMENTS_FILE = "requirements.txt"
@@ -22,15 +23,51 @@ def create_output_dir():
     os.chmod(OUTPUT_DIR, 0o777)
 
 
+def upgrade_schema(engine, Base):
+    # create_all() skips tables that already exist, so add any columns and
+    # indexes that were introduced after the table was first created
+    from sqlalchemy import inspect, text
+    from sqlalchemy.schema import CreateIndex
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                print(f"Adding column {table.name}.{column.name}...")
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NULL"))
+                if column.default is not None and column.default.is_scalar:
+                    conn.execute(table.update().values({column.name: column.default.arg}))
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    print(f"Creating index {index.name}...")
+                    conn.execute(CreateIndex(index))
+
+
 def init_database():
     from db.session import engine, Base, SessionLocal
     from db import models
 
     print("Creating tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine, Base)
 
     db = SessionLocal()
 
+    # First run after upgrading: existing jobs are not in the rollups yet
+    if db.query(models.JobStatsRollup).count() == 0 and db.query(models.Job).count() > 0:
+        from db import rollups
+        print("Backfilling job statistics rollups...")
+        rollups.rebuild(db)
+
     # Optional: Insert a default S3 credential if none exists
     if db.query(models.S3Credential).count() == 0:
         print("Inserting initial S3 credentials...")
@@ -78,6 +115,21 @@ def init_database():
     db.close()
 
 
+def backfill_rollups():
+    # Rebuilds job_stats_rollups from the jobs table, e.g. after upgrading
+    from db.session import engine, Base, SessionLocal
+    from db import rollups
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("Rebuilding job statistics rollups...")
+        rollups.rebuild(db)
+        print("Rollups rebuilt.")
+    finally:
+        db.close()
+
+
 def show_success():
     print("\nSetup complete!")
     print("You can now run the Controller server with:")
@@ -85,6 +137,9 @@ def show_success():
 
 
 if __name__ == "__main__":
+    if "--backfill-rollups" in sys.argv:
+        backfill_rollups()
+        sys.exit(0)
     try:
         install_dependencies()
         create_output_dir()
@@ -6,6 +6,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
 import uvicorn
+from config.settings import settings
 
 if __name__ == "__main__":
-    uvicorn.run("api.main:app", host="0.0.0.0", port=9000, reload=True, workers=1)
+    if settings.IS_PRODUCTION or "--production" in sys.argv:
+        # Several API processes; the one holding the controller lease runs the background loops
+        uvicorn.run("api.main:app", host=settings.HOST, port=settings.PORT, reload=False, workers=settings.CONTROLLER_WORKERS)
+    else:
+        uvicorn.run("api.main:app", host="0.0.0.0", port=9000, reload=True, workers=1)